@@ -0,0 +1,327 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+
+import busca
+import dados
+import figuras
+import instrumentacao
+import matriz_od
+import rankings
+
+_log = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------
+# GRAFO DE ARTEFATOS DERIVADOS
+# ---------------------------------------------------------------
+# Cada artefato da página é um nó com dependências explícitas:
+#
+#   arquivo-fonte -> tabela limpa -> agregados/índices -> figura serializada
+#
+# A impressão digital de uma fonte é o hash do conteúdo (recalculado só
+# quando tamanho ou mtime mudam); a de um nó derivado é o hash do seu nome,
+# da sua versão e das impressões das dependências. Um valor só é refeito
+# quando a impressão muda, então uma revisão do saldo não toca no índice
+# municipal e vice-versa. Nós marcados com disco=True ficam também em
+# .cache/artefatos; as figuras vão para o CacheFiguras, que já guarda o JSON
+# em disco.
+#
+# O Vigia confere as fontes periodicamente. Quando uma muda, o Grafo refaz
+# em segundo plano só os nós já usados que dependem dela e troca os valores
+# de uma vez; quem chama obter() continua recebendo os antigos até lá, e o
+# processo não precisa ser reiniciado.
+
+
+class Fonte:
+
+    def __init__(self, nome, caminho):
+        self.nome = nome
+        self.caminho = caminho
+        self.dependencias = ()
+
+
+class No:
+
+    def __init__(self, nome, construir, dependencias=(), versao=1, disco=False, figura=False):
+        self.nome = nome
+        self.construir = construir
+        self.dependencias = tuple(dependencias)
+        self.versao = versao
+        self.disco = disco
+        self.figura = figura
+
+
+class Grafo:
+
+    def __init__(self, pasta_cache=None, cache_figuras=None):
+        self.pasta_cache = pasta_cache
+        # Um CacheFiguras vazio é falso (tem __len__), então nada de "or"
+        self.cache_figuras = figuras.CacheFiguras() if cache_figuras is None else cache_figuras
+        self._nos = {}
+        self._valores = {}
+        self._impressoes = {}
+        self._conteudo = {}
+        self._trava = threading.RLock()
+        self._trava_atualizacao = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+        self.leituras_disco = 0
+        self.atualizacoes = []
+
+    # Registro
+
+    def _registrar(self, no):
+        for dependencia in no.dependencias:
+            if dependencia not in self._nos:
+                raise KeyError(f"{no.nome}: dependência desconhecida {dependencia}")
+        self._nos[no.nome] = no
+        self._impressoes.pop(no.nome, None)
+        return no
+
+    def fonte(self, nome, caminho):
+        return self._registrar(Fonte(nome, caminho))
+
+    def no(self, nome, construir, dependencias=(), versao=1, disco=False):
+        return self._registrar(No(nome, construir, dependencias, versao, disco))
+
+    def figura(self, nome, construir, dependencias=(), versao=1):
+        return self._registrar(No(nome, construir, dependencias, versao, figura=True))
+
+    def __contains__(self, nome):
+        return nome in self._nos
+
+    def dependentes(self, nomes):
+        """Os nós dados e todos os que dependem deles, em ordem topológica."""
+        alvo = set(nomes)
+        # _nos está em ordem de registro, que já é topológica
+        for nome, no in self._nos.items():
+            if alvo.intersection(no.dependencias):
+                alvo.add(nome)
+        return [nome for nome in self._nos if nome in alvo]
+
+    # Impressões digitais
+
+    def _impressao_fonte(self, fonte):
+        info = os.stat(fonte.caminho)
+        chave = (info.st_size, info.st_mtime_ns)
+        anterior = self._conteudo.get(fonte.nome)
+        if anterior is None or anterior[0] != chave:
+            anterior = (chave, dados.hash_arquivo(fonte.caminho))
+            self._conteudo[fonte.nome] = anterior
+        return anterior[1]
+
+    def _calcular_impressoes(self):
+        impressoes = {}
+        for nome, no in self._nos.items():
+            if isinstance(no, Fonte):
+                impressoes[nome] = self._impressao_fonte(no)
+            else:
+                texto = json.dumps([nome, no.versao, [impressoes[d] for d in no.dependencias]])
+                impressoes[nome] = hashlib.sha256(texto.encode("utf-8")).hexdigest()
+        return impressoes
+
+    def impressao(self, nome):
+        with self._trava:
+            if nome not in self._impressoes:
+                self._impressoes = self._calcular_impressoes()
+            return self._impressoes[nome]
+
+    # Construção
+
+    def _caminho_disco(self, nome, impressao):
+        return os.path.join(self.pasta_cache, f"{nome}-{impressao[:16]}.pkl")
+
+    def _ler_disco(self, nome, impressao):
+        try:
+            with open(self._caminho_disco(nome, impressao), "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            raise LookupError(nome)
+
+    def _gravar_disco(self, nome, impressao, valor):
+        destino = self._caminho_disco(nome, impressao)
+        try:
+            os.makedirs(self.pasta_cache, exist_ok=True)
+            with open(destino + ".tmp", "wb") as f:
+                pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(destino + ".tmp", destino)
+        except OSError:
+            return
+        # Versões antigas do mesmo nó não servem mais
+        for antigo in glob.glob(os.path.join(glob.escape(self.pasta_cache), f"{glob.escape(nome)}-*.pkl")):
+            if antigo != destino:
+                try:
+                    os.remove(antigo)
+                except OSError:
+                    pass
+
+    def _materializar(self, nome, impressoes, prontos, destino):
+        """Valor de nome sob as impressões dadas, construindo o que faltar.
+
+        prontos são os valores já existentes (nome -> (impressão, valor)); os
+        que forem construídos vão para destino.
+        """
+        impressao = impressoes[nome]
+        for origem in (destino, prontos):
+            if nome in origem and origem[nome][0] == impressao:
+                return origem[nome][1]
+
+        no = self._nos[nome]
+        if isinstance(no, Fonte):
+            valor = no.caminho
+        else:
+            def construir():
+                argumentos = [self._materializar(d, impressoes, prontos, destino) for d in no.dependencias]
+                return no.construir(*argumentos)
+
+            # Com a instrumentação ligada, cada carga vira um trecho da
+            # execução corrente (inclui as dependências construídas junto)
+            with instrumentacao.trecho("artefato:" + nome):
+                if no.figura:
+                    # Com o JSON já em disco as dependências nem são carregadas
+                    valor = self.cache_figuras.obter(nome, impressao, construir)
+                elif no.disco and self.pasta_cache:
+                    try:
+                        valor = self._ler_disco(nome, impressao)
+                        self.leituras_disco += 1
+                    except LookupError:
+                        valor = construir()
+                        self._gravar_disco(nome, impressao, valor)
+                else:
+                    valor = construir()
+        destino[nome] = (impressao, valor)
+        return valor
+
+    def obter(self, nome):
+        with self._trava:
+            impressao = self.impressao(nome)
+            atual = self._valores.get(nome)
+            if atual is not None and atual[0] == impressao:
+                self.acertos += 1
+                return atual[1]
+            self.faltas += 1
+            return self._materializar(nome, self._impressoes, self._valores, self._valores)
+
+    # Atualização a quente
+
+    def atualizar(self):
+        """Confere as fontes e refaz os nós em uso que ficaram desatualizados.
+
+        Devolve os nomes dos nós refeitos. Os novos valores são montados fora
+        da trava de leitura e trocados todos juntos no fim.
+        """
+        with self._trava_atualizacao:
+            with self._trava:
+                anteriores = self._impressoes or self._calcular_impressoes()
+                prontos = dict(self._valores)
+            novas = self._calcular_impressoes()
+            mudaram = [n for n in novas if anteriores.get(n) != novas[n]]
+            if not mudaram:
+                return []
+
+            em_uso = [n for n in self.dependentes(mudaram) if n in prontos]
+            refeitos = {}
+            for nome in em_uso:
+                self._materializar(nome, novas, prontos, refeitos)
+
+            with self._trava:
+                self._impressoes = novas
+                self._valores.update(refeitos)
+                for nome in list(self._valores):
+                    if self._valores[nome][0] != novas.get(nome):
+                        del self._valores[nome]
+            self.atualizacoes.append((time.time(), list(refeitos)))
+            return list(refeitos)
+
+
+class Vigia:
+    """Thread que chama grafo.atualizar() a cada intervalo de segundos."""
+
+    def __init__(self, grafo, intervalo=2.0, ao_atualizar=None):
+        self.grafo = grafo
+        self.intervalo = intervalo
+        self.ao_atualizar = ao_atualizar
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._vigiar, name="vigia-artefatos", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self, esperar=True):
+        self._parar.set()
+        if self._thread is not None and esperar:
+            self._thread.join()
+            self._thread = None
+
+    def _vigiar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                refeitos = self.grafo.atualizar()
+            except Exception:  # noqa: BLE001 - o vigia não pode morrer
+                # Arquivo no meio de uma cópia ou mal formado (zip truncado,
+                # XML quebrado, CSV sem coluna...): mantém os valores atuais e
+                # tenta de novo na próxima volta
+                _log.warning("falha ao atualizar os artefatos; mantendo os valores atuais", exc_info=True)
+                continue
+            if refeitos and self.ao_atualizar:
+                self.ao_atualizar(refeitos)
+
+
+_vigias = {}
+_trava_vigias = threading.Lock()
+
+
+def vigiar(chave, grafo, **opcoes):
+    """Inicia o vigia de um grafo, parando o que vigiava o grafo anterior da
+    mesma chave (um cache_resource limpo e refeito, por exemplo)."""
+    with _trava_vigias:
+        anterior = _vigias.pop(chave, None)
+        if anterior is not None:
+            # Sem esperar: se estiver no meio de uma atualização, sai no fim dela
+            anterior.parar(esperar=False)
+        _vigias[chave] = Vigia(grafo, **opcoes).iniciar()
+        return _vigias[chave]
+
+
+# ---------------------------------------------------------------
+# ARTEFATOS DA PÁGINA
+# ---------------------------------------------------------------
+
+def grafo_pagina(pasta=".", cache_figuras=None):
+    grafo = Grafo(os.path.join(pasta, dados.PASTA_CACHE, "artefatos"), cache_figuras)
+
+    grafo.fonte("municipios.xlsx", os.path.join(pasta, "municipios.xlsx"))
+    grafo.fonte("saldo.csv", os.path.join(pasta, "saldo_migratorio_estados.csv"))
+    grafo.fonte("imigrantes.xlsx", os.path.join(pasta, "imigrantes.xlsx"))
+
+    # Tabelas limpas
+    grafo.no("base", dados.base_municipios, ["municipios.xlsx"])
+    grafo.no("saldo", dados.ler_saldo, ["saldo.csv"], disco=True)
+    grafo.no("imigrantes", dados.ler_imigrantes, ["imigrantes.xlsx"], disco=True)
+
+    # Agregados e índices
+    grafo.no("indice", dados.IndiceMunicipios, ["base"])
+    grafo.no("busca", lambda indice: busca.IndiceBusca(indice.base.municipios, indice.total), ["indice"])
+    grafo.no("rankings", rankings.Rankings, ["indice"])
+    grafo.no("matriz_regioes", lambda base: matriz_od.calcular_matriz_od(base, diagonal=True), ["base"])
+    grafo.no("matriz_migrantes", lambda base: matriz_od.calcular_matriz_od(base, diagonal=False), ["base"])
+
+    # Figuras
+    grafo.figura("figura_saldo", figuras.figura_saldo, ["saldo"], versao=figuras.VERSAO_FIGURAS)
+    grafo.figura("figura_mapa", figuras.figura_mapa, ["saldo"], versao=figuras.VERSAO_FIGURAS)
+    # Linhas: região de nascimento; colunas: região de residência
+    grafo.figura(
+        "figura_matriz",
+        lambda matriz: figuras.figura_matriz(matriz["populacao"].T, matriz["pct_coluna"].T),
+        ["matriz_migrantes"], versao=figuras.VERSAO_FIGURAS,
+    )
+    grafo.figura("figura_imigrantes", figuras.figura_imigrantes, ["imigrantes"], versao=figuras.VERSAO_FIGURAS)
+    return grafo
@@ -0,0 +1,65 @@
+# Quanto cada gráfico custa por requisição: montar a figura do zero e
+# serializá-la (como o script fazia a cada rerun) contra entregar a figura do
+# CacheFiguras. Nos dois casos a medida inclui o trabalho que o
+# st.plotly_chart faz com a figura recebida (to_dict + to_json).
+#
+#   python benchmarks/bench_figuras.py
+
+import os
+import sys
+import time
+
+import plotly.io as pio
+import plotly.tools
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import dados  # noqa: E402
+import figuras  # noqa: E402
+import matriz_od  # noqa: E402
+
+REPETICOES = 10
+
+
+def servir(figura):
+    # O que o st.plotly_chart faz com a figura antes de mandá-la ao navegador
+    figura = plotly.tools.return_figure_from_figure_or_data(figura, validate_figure=True)
+    return pio.to_json(figura, validate=False)
+
+
+def media_ms(funcao):
+    funcao()
+    inicio = time.perf_counter()
+    for _ in range(REPETICOES):
+        funcao()
+    return (time.perf_counter() - inicio) / REPETICOES * 1000
+
+
+def construtores():
+    df_saldo = dados.ler_saldo(os.path.join(RAIZ, "saldo_migratorio_estados.csv"))
+    df_long = dados.ler_imigrantes(os.path.join(RAIZ, "imigrantes.xlsx"))
+    base = dados.base_municipios(os.path.join(RAIZ, "municipios.xlsx"))
+    regioes = matriz_od.calcular_matriz_od(base, diagonal=False)
+    return {
+        "saldo": lambda: figuras.figura_saldo(df_saldo),
+        "mapa": lambda: figuras.figura_mapa(df_saldo),
+        "matriz": lambda: figuras.figura_matriz(regioes["populacao"].T, regioes["pct_coluna"].T),
+        "imigrantes": lambda: figuras.figura_imigrantes(df_long),
+    }
+
+
+def main():
+    cache = figuras.CacheFiguras()
+    print(f"média de {REPETICOES} requisições por gráfico\n")
+    print(f"{'gráfico':<12}{'montar (ms)':>13}{'cache (ms)':>12}{'economia (ms)':>15}{'JSON (KB)':>11}")
+    for nome, construir in construtores().items():
+        sem_cache = media_ms(lambda: servir(construir()))
+        com_cache = media_ms(lambda: servir(cache.obter(nome, "bench", construir)))
+        tamanho = len(cache.json(figuras.chave_figura(nome, "bench"))) / 1024
+        print(f"{nome:<12}{sem_cache:>13.1f}{com_cache:>12.1f}{sem_cache - com_cache:>15.1f}{tamanho:>11.1f}")
+    print(f"\ncache: {cache.acertos} acertos, {cache.faltas} faltas, {cache.bytes / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Mede a formatação de uma matriz município x UF (5.570 x 27) com as funções
+# vetorizadas de formatacao.py, comparando com o laço de iloc e os .apply
+# usados antes no script.
+#
+#   python benchmarks/bench_formatacao.py
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import formatacao  # noqa: E402
+
+REPETICOES = 5
+
+
+def rotulos_com_iloc(matriz, matriz_pct):
+    text_display = []
+    for i in range(len(matriz)):
+        row_text = []
+        for j in range(len(matriz.columns)):
+            pop_val = int(matriz.iloc[i, j]) if not pd.isna(matriz.iloc[i, j]) else 0
+            pct_val = matriz_pct.iloc[i, j] if not pd.isna(matriz_pct.iloc[i, j]) else 0
+
+            if pop_val == 0:
+                row_text.append("—")
+            else:
+                pct_formatada = f"{pct_val:.1f}".replace(".", ",") + "%"
+                pop_formatado = f"{pop_val:,}".replace(",", ".")
+                row_text.append(f"{pct_formatada}<br>{pop_formatado}")
+        text_display.append(row_text)
+    return text_display
+
+
+def inteiros_com_apply(serie):
+    return serie.apply(lambda x: f"{x:,}".replace(",", "."))
+
+
+def melhor_tempo(funcao, *args):
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1000
+
+
+def main():
+    gerador = np.random.default_rng(0)
+    populacao = gerador.integers(0, 2_000_000, size=(5570, 27))
+    populacao[gerador.random(populacao.shape) < 0.2] = 0
+    percentual = populacao / populacao.sum(axis=1, keepdims=True) * 100
+    matriz = pd.DataFrame(populacao)
+    matriz_pct = pd.DataFrame(percentual)
+    serie = pd.Series(populacao.ravel())
+
+    assert formatacao.rotulos_celulas(percentual, populacao).tolist() == rotulos_com_iloc(matriz, matriz_pct)
+
+    print(f"matriz {populacao.shape[0]} x {populacao.shape[1]} ({populacao.size} células), melhor de {REPETICOES}\n")
+    print(f"{'operação':<34}{'antes (ms)':>12}{'agora (ms)':>12}")
+    linhas = [
+        ("rótulos pct<br>pop", lambda: rotulos_com_iloc(matriz, matriz_pct),
+         lambda: formatacao.rotulos_celulas(percentual, populacao)),
+        ("inteiros com separador", lambda: inteiros_com_apply(serie),
+         lambda: formatacao.formatar_inteiros(serie)),
+        ("percentuais", lambda: pd.Series(percentual.ravel()).apply(lambda x: f"{x:.2f}%".replace(".", ",")),
+         lambda: formatacao.formatar_percentuais(percentual)),
+    ]
+    for nome, antes, agora in linhas:
+        print(f"{nome:<34}{melhor_tempo(antes):>12.1f}{melhor_tempo(agora):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
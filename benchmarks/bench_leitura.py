@@ -0,0 +1,78 @@
+# Compara o leitor incremental (leitor_xlsx.py) com o pd.read_excel usado antes
+# em carregar_dados(). Cada variante roda num processo separado para que o pico
+# de memória (ru_maxrss) de uma não contamine a outra.
+#
+#   python benchmarks/bench_leitura.py [caminho/para/municipios.xlsx]
+
+import os
+import resource
+import subprocess
+import sys
+import time
+import zipfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+def ler_com_read_excel(caminho):
+    import pandas as pd
+
+    df = pd.read_excel(caminho)
+    df.columns = [col.strip() for col in df.columns]
+    df["População"] = df["População"].replace("-", 0).astype(int)
+    return len(df)
+
+
+def ler_com_leitor_incremental(caminho):
+    from leitor_xlsx import ler_municipios_xlsx
+
+    return len(ler_municipios_xlsx(caminho)["municipio"])
+
+
+VARIANTES = {
+    "read_excel": ler_com_read_excel,
+    "leitor_xlsx": ler_com_leitor_incremental,
+}
+
+
+def _rss_mb():
+    # No Linux ru_maxrss vem em KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def medir(variante, caminho):
+    # Importa as dependências antes para não contar o custo dos imports
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import openpyxl  # noqa: F401
+
+    rss_antes = _rss_mb()
+    inicio = time.perf_counter()
+    linhas = VARIANTES[variante](caminho)
+    segundos = time.perf_counter() - inicio
+    print(f"{linhas}\t{segundos}\t{_rss_mb() - rss_antes}\t{_rss_mb()}")
+
+
+def main():
+    caminho = sys.argv[1] if len(sys.argv) > 1 else os.path.join(RAIZ, "municipios.xlsx")
+    with zipfile.ZipFile(caminho) as zf:
+        tamanho_xml = zf.getinfo("xl/worksheets/sheet1.xml").file_size / 1e6
+
+    print(f"{os.path.basename(caminho)}: sheet1.xml com {tamanho_xml:.1f} MB descompactado\n")
+    print(f"{'variante':<14}{'linhas':>9}{'tempo (s)':>11}{'linhas/s':>11}{'MB/s':>8}{'pico RSS (+MB)':>16}")
+    for variante in VARIANTES:
+        saida = subprocess.run(
+            [sys.executable, __file__, "--variante", variante, caminho],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        linhas, segundos, rss = int(saida[0]), float(saida[1]), float(saida[2])
+        print(f"{variante:<14}{linhas:>9}{segundos:>11.2f}{linhas / segundos:>11.0f}"
+              f"{tamanho_xml / segundos:>8.1f}{rss:>16.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--variante":
+        medir(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,102 @@
+# Requisições por segundo do servidor de consultas (consulta.py) com vários
+# clientes simultâneos. O servidor roda num processo à parte, para não
+# disputar o GIL com o gerador de carga; cada cliente é uma thread com uma
+# conexão HTTP/1.1 persistente que percorre uma mistura fixa de rotas.
+# Cada rodada é feita com o cache de respostas ligado e desligado.
+#
+#   python benchmarks/bench_servico.py [--segundos 5] [--clientes 1 4 16]
+
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import quote
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import matriz_od  # noqa: E402
+
+CAPITAIS = [quote(c) for c in matriz_od.CAPITAIS]
+ROTAS = (
+    [f"/municipio?nome={c}" for c in CAPITAIS]
+    + [f"/lote?nome={';'.join(CAPITAIS[i:i + 5])}" for i in range(0, len(CAPITAIS), 5)]
+    + ["/matriz", "/matriz?origem=uf&valor=pct_linha", "/matriz?residencia=uf&diagonal=0", "/saldo"]
+)
+
+
+def subir_servidor(cache_mb):
+    processo = subprocess.Popen(
+        [sys.executable, os.path.join(RAIZ, "consulta.py"), "servir", "--porta", "0", "--cache-mb", str(cache_mb)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    linha = processo.stdout.readline()
+    porta = int(linha.rsplit(":", 1)[1])
+    # Primeira consulta carrega a base; fica fora da medida
+    conexao = http.client.HTTPConnection("127.0.0.1", porta)
+    conexao.request("GET", "/municipio?nome=Manaus")
+    conexao.getresponse().read()
+    conexao.close()
+    return processo, porta
+
+
+def cliente(porta, deslocamento, prazo, latencias):
+    conexao = http.client.HTTPConnection("127.0.0.1", porta)
+    i = deslocamento
+    while time.perf_counter() < prazo:
+        rota = ROTAS[i % len(ROTAS)]
+        inicio = time.perf_counter()
+        conexao.request("GET", rota)
+        resposta = conexao.getresponse()
+        resposta.read()
+        if resposta.status != 200:
+            raise RuntimeError(f"{rota}: HTTP {resposta.status}")
+        latencias.append(time.perf_counter() - inicio)
+        i += 1
+    conexao.close()
+
+
+def rodada(porta, clientes, segundos):
+    latencias = [[] for _ in range(clientes)]
+    prazo = time.perf_counter() + segundos
+    threads = [
+        threading.Thread(target=cliente, args=(porta, c * 7, prazo, latencias[c]))
+        for c in range(clientes)
+    ]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+    todas = np.concatenate([np.asarray(l) for l in latencias]) * 1000
+    return len(todas) / duracao, np.percentile(todas, 50), np.percentile(todas, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--segundos", type=float, default=5)
+    parser.add_argument("--clientes", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    print(f"{len(ROTAS)} rotas em rodízio, {args.segundos:g} s por rodada\n")
+    print(f"{'cache':<10}{'clientes':>9}{'req/s':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+    for cache_mb in (32, 0):
+        processo, porta = subir_servidor(cache_mb)
+        try:
+            for clientes in args.clientes:
+                por_segundo, p50, p95 = rodada(porta, clientes, args.segundos)
+                rotulo = "ligado" if cache_mb else "desligado"
+                print(f"{rotulo:<10}{clientes:>9}{por_segundo:>10.0f}{p50:>10.2f}{p95:>10.2f}")
+        finally:
+            processo.terminate()
+            processo.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# Carga com várias sessões simultâneas sobre um servidor `streamlit run` de
+# verdade, para dimensionar réplicas e pegar problemas de trava entre
+# sessões. Para cada N pedido, sobe um servidor novo, aquece os caches com
+# uma sessão, mede o RSS do processo do servidor e abre N clientes websocket
+# sem navegador, que falam o protocolo do Streamlit (BackMsg/ForwardMsg)
+# como o front-end: cada passo manda um rerun_script com o estado de todos
+# os widgets conhecidos e, quando o widget está num st.fragment, o
+# fragment_id dele, de modo que o servidor roda só o fragmento, como faria
+# para um leitor. A latência vai do envio até o script_finished.
+#
+# O roteiro de cada sessão: abrir a página, buscar um município, trocar de
+# município, filtrar por UF, comparar municípios e folhear os rankings.
+# Rolar o texto não gera rerun no Streamlit; entra como pausa entre os
+# passos (--pausa). As sessões ficam conectadas até a medida final do RSS
+# do processo do servidor, que então inclui o estado de cada uma.
+#
+#   python benchmarks/bench_sessoes.py [--sessoes 1 4 16] [--pausa 0] [--json saida.json]
+#
+# Os clientes usam o pacote websockets (pip install websockets), que só este
+# benchmark usa; por isso ele fica fora do requirements.txt da página.
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import matriz_od  # noqa: E402
+
+SCRIPT = os.path.join(RAIZ, "streamlitidp.py")
+BUSCAS = ("porto alegre", "manaus", "recife", "floripa", "campinas", "joao pessoa",
+          "belo horizonte", "goiania", "caxias do sul", "sao luis", "cuiaba", "natal")
+TEMPO_LIMITE = 300
+PAGINA = re.compile(r"Página \(de \d+\):")
+
+# Campo do WidgetState que cada tipo de widget usa
+CAMPOS = {"text_input": "string_value", "selectbox": "string_value", "radio": "string_value",
+          "number_input": "double_value"}
+FIM_OK = (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY)
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def subir_servidor():
+    porta = _porta_livre()
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", SCRIPT,
+         "--server.headless", "true", "--server.port", str(porta), "--server.address", "127.0.0.1",
+         "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        cwd=RAIZ, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{porta}/_stcore/health", timeout=1)
+            return servidor, porta
+        except OSError:
+            if servidor.poll() is not None:
+                break
+            time.sleep(0.1)
+    servidor.kill()
+    raise RuntimeError("o servidor do Streamlit não subiu")
+
+
+class Sessao:
+    """Um leitor: uma conexão websocket e o estado dos widgets que ele viu."""
+
+    def __init__(self, conexao):
+        self.conexao = conexao
+        # rótulo -> (tipo, id, fragment_id)
+        self.widgets = {}
+        self.estados = {}
+
+    async def rerun(self, fragmento=""):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        msg.rerun_script.fragment_id = fragmento
+        msg.rerun_script.widget_states.widgets.extend(self.estados.values())
+        inicio = time.perf_counter()
+        await self.conexao.send(msg.SerializeToString())
+        while True:
+            resposta = ForwardMsg()
+            resposta.ParseFromString(await asyncio.wait_for(self.conexao.recv(), TEMPO_LIMITE))
+            tipo = resposta.WhichOneof("type")
+            if tipo == "delta" and resposta.delta.WhichOneof("type") == "new_element":
+                elemento = resposta.delta.new_element
+                campo = elemento.WhichOneof("type")
+                if campo == "exception":
+                    raise RuntimeError(elemento.exception.message)
+                if campo in CAMPOS:
+                    proto = getattr(elemento, campo)
+                    self.widgets[proto.label] = (campo, proto.id, resposta.delta.fragment_id)
+            elif tipo == "script_finished":
+                if resposta.script_finished not in FIM_OK:
+                    raise RuntimeError(f"script terminou com status {resposta.script_finished}")
+                return (time.perf_counter() - inicio) * 1000
+
+    async def mudar(self, rotulo, valor):
+        # Rótulo exato; os que mudam com os dados ("Página (de 112):") vêm
+        # como expressão regular, que tem de casar com o rótulo inteiro
+        if isinstance(rotulo, re.Pattern):
+            achados = [w for r, w in self.widgets.items() if rotulo.fullmatch(r)]
+        else:
+            achados = [self.widgets[rotulo]] if rotulo in self.widgets else []
+        if len(achados) != 1:
+            raise RuntimeError(f"widget {rotulo!r}: {len(achados)} encontrados entre {list(self.widgets)}")
+        tipo, identificador, fragmento = achados[0]
+        estado = WidgetState(id=identificador)
+        setattr(estado, CAMPOS[tipo], valor)
+        self.estados[identificador] = estado
+        return await self.rerun(fragmento)
+
+
+def roteiro(i):
+    """Passos (nome, ação) da sessão i; cada ação termina num rerun."""
+    busca = BUSCAS[i % len(BUSCAS)]
+    outra = BUSCAS[(i + 5) % len(BUSCAS)]
+    uf = matriz_od.SIGLAS[i % len(matriz_od.SIGLAS)]
+    return [
+        ("abrir", lambda s: s.rerun()),
+        ("buscar", lambda s: s.mudar("Busque o município:", busca)),
+        ("trocar", lambda s: s.mudar("Busque o município:", outra)),
+        ("filtrar_uf", lambda s: s.mudar("UF", uf)),
+        ("comparar", lambda s: s.mudar("Quais municípios comparar?", "Todos de uma UF")),
+        ("ranking", lambda s: s.mudar("Ranking:", "Destinos de quem nasceu em...")),
+        ("pagina", lambda s: s.mudar(PAGINA, 2.0)),
+    ]
+
+
+async def _conectar(porta):
+    return await websockets.connect(f"ws://127.0.0.1:{porta}/_stcore/stream",
+                                    subprotocols=["streamlit"], max_size=None)
+
+
+async def _rodada(porta, pid, n, pausa):
+    # Caches do processo (grafo de artefatos, figuras) quentes antes de medir
+    aquecimento = Sessao(await _conectar(porta))
+    for _, acao in roteiro(0):
+        await acao(aquecimento)
+    await aquecimento.conexao.close()
+    await asyncio.sleep(1)
+    rss_base = rss_mb(pid)
+
+    sessoes = [Sessao(await _conectar(porta)) for _ in range(n)]
+    latencias = [[] for _ in range(n)]
+    erros = []
+
+    async def sessao(i):
+        gerador = np.random.default_rng(i)
+        try:
+            for nome, acao in roteiro(i):
+                if pausa:
+                    await asyncio.sleep(gerador.exponential(pausa))
+                latencias[i].append((nome, await acao(sessoes[i])))
+        except Exception as erro:  # noqa: BLE001 - o erro vai para o relatório
+            erros.append(f"sessão {i}: {erro!r}")
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(sessao(i) for i in range(n)))
+    duracao = time.perf_counter() - inicio
+
+    # As sessões continuam conectadas (leitores com a aba aberta) na medida final
+    rss_final = rss_mb(pid)
+    for s in sessoes:
+        await s.conexao.close()
+    return latencias, erros, duracao, rss_base, rss_final
+
+
+def executar(n, pausa):
+    # Um servidor novo por N, para o RSS de uma rodada não contaminar a outra
+    servidor, porta = subir_servidor()
+    try:
+        latencias, erros, duracao, rss_base, rss_final = asyncio.run(_rodada(porta, servidor.pid, n, pausa))
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+    todas = np.array([ms for lista in latencias for _, ms in lista])
+    por_passo = {}
+    for lista in latencias:
+        for nome, ms in lista:
+            por_passo.setdefault(nome, []).append(ms)
+    return {
+        "sessoes": n,
+        "reruns": len(todas),
+        "duracao_s": duracao,
+        "reruns_por_s": len(todas) / duracao,
+        "p50_ms": float(np.percentile(todas, 50)) if len(todas) else None,
+        "p95_ms": float(np.percentile(todas, 95)) if len(todas) else None,
+        "p99_ms": float(np.percentile(todas, 99)) if len(todas) else None,
+        "p50_por_passo_ms": {nome: float(np.median(ms)) for nome, ms in por_passo.items()},
+        "rss_base_mb": rss_base,
+        "rss_final_mb": rss_final,
+        "rss_por_sessao_mb": (rss_final - rss_base) / n,
+        "erros": erros,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga com N sessões simultâneas num servidor streamlit run.")
+    parser.add_argument("--sessoes", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--pausa", type=float, default=0.0,
+                        help="pausa média (s) entre passos de uma sessão; 0 = carga máxima")
+    parser.add_argument("--json", help="grava os resultados completos neste arquivo")
+    args = parser.parse_args()
+
+    print(f"roteiro de {len(roteiro(0))} reruns por sessão, pausa média {args.pausa:g} s\n")
+    print(f"{'sessões':>8}{'reruns':>8}{'reruns/s':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'RSS base (MB)':>15}{'RSS fim (MB)':>14}{'MB/sessão':>11}")
+    resultados = []
+    for n in args.sessoes:
+        r = executar(n, args.pausa)
+        resultados.append(r)
+        print(f"{r['sessoes']:>8}{r['reruns']:>8}{r['reruns_por_s']:>10.1f}{r['p50_ms'] or 0:>10.0f}{r['p95_ms'] or 0:>10.0f}"
+              f"{r['p99_ms'] or 0:>10.0f}{r['rss_base_mb']:>15.0f}{r['rss_final_mb']:>14.0f}{r['rss_por_sessao_mb']:>11.2f}",
+              flush=True)
+        for erro in r["erros"]:
+            print(f"  {erro}")
+
+    if len(resultados) > 1:
+        # A diferença de uma rodada só é ruidosa (alocador, coleta); a
+        # inclinação entre rodadas estima melhor o custo de cada sessão
+        n = np.array([r["sessoes"] for r in resultados])
+        crescimento = np.array([r["rss_final_mb"] - r["rss_base_mb"] for r in resultados])
+        print(f"\nmemória marginal por sessão (inclinação entre rodadas): {np.polyfit(n, crescimento, 1)[0]:.2f} MB")
+
+    passos = resultados[-1]["p50_por_passo_ms"]
+    print(f"\np50 por passo com {resultados[-1]['sessoes']} sessões: "
+          + ", ".join(f"{nome} {ms:.0f} ms" for nome, ms in passos.items()))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=1)
+
+
+if __name__ == "__main__":
+    main()
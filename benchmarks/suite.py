@@ -0,0 +1,339 @@
+# Suíte de benchmarks da página, rodada offline com os arquivos de dados do
+# próprio repositório. Mede a partida a frio, as leituras (XLSX, CSV e cache
+# colunar), o índice e as matrizes, a montagem dos rótulos, cada figura e
+# uma sessão roteirizada pelo AppTest do Streamlit. Cada execução é anexada
+# a um histórico em JSON Lines e comparada com uma linha de base: o processo
+# sai com código 1 se algum caso piorou além da tolerância.
+#
+#   python benchmarks/suite.py                      # mede, grava e compara
+#   python benchmarks/suite.py --salvar-base        # grava como linha de base
+#   python benchmarks/suite.py --casos figura_ matriz_ --tolerancia 0.3
+#   python benchmarks/suite.py --tolerancia-caso partida_fria=1.0
+#
+# Os números dependem da máquina; histórico e linha de base ficam em
+# benchmarks/resultados, fora do controle de versão. Os bench_*.py ao lado
+# continuam sendo as comparações pontuais de antes e depois de cada mudança.
+
+import argparse
+import functools
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import dados  # noqa: E402
+import figuras  # noqa: E402
+import formatacao  # noqa: E402
+import leitor_xlsx  # noqa: E402
+import matriz_od  # noqa: E402
+import rankings  # noqa: E402
+
+PASTA_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+SCRIPT = os.path.join(RAIZ, "streamlitidp.py")
+
+TOLERANCIA = 0.25
+# Diferenças menores que isto são ruído, qualquer que seja a proporção
+PISO_MS = 2.0
+
+
+# ---------------------------------------------------------------
+# CASOS
+# ---------------------------------------------------------------
+
+CASOS = {}
+
+
+def caso(nome, repeticoes=5, aquecer=True):
+    def registrar(funcao):
+        CASOS[nome] = (funcao, repeticoes, aquecer)
+        return funcao
+    return registrar
+
+
+class Contexto:
+    """Dados compartilhados entre os casos, carregados só quando pedidos."""
+
+    municipios = os.path.join(RAIZ, "municipios.xlsx")
+    saldo = os.path.join(RAIZ, "saldo_migratorio_estados.csv")
+    imigrantes = os.path.join(RAIZ, "imigrantes.xlsx")
+
+    @functools.cached_property
+    def base(self):
+        return dados.base_municipios(self.municipios)
+
+    @functools.cached_property
+    def indice(self):
+        return dados.IndiceMunicipios(self.base)
+
+    @functools.cached_property
+    def df_saldo(self):
+        return dados.ler_saldo(self.saldo)
+
+    @functools.cached_property
+    def df_imigrantes(self):
+        return dados.ler_imigrantes(self.imigrantes)
+
+    @functools.cached_property
+    def regioes(self):
+        return matriz_od.calcular_matriz_od(self.base, diagonal=False)
+
+    @functools.cached_property
+    def municipio_uf(self):
+        return matriz_od.calcular_matriz_od(self.base, residencia="municipio", origem="uf")
+
+
+@caso("partida_fria", repeticoes=3, aquecer=False)
+def _partida_fria(ctx):
+    # Processo novo: imports, leitura dos caches em disco e a primeira
+    # execução completa do script, como depois de reiniciar o servidor
+    codigo = (
+        "from streamlit.testing.v1 import AppTest\n"
+        f"at = AppTest.from_file({SCRIPT!r}, default_timeout=300)\n"
+        "at.run()\n"
+        "assert not at.exception, at.exception\n"
+    )
+    subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, check=True, capture_output=True)
+
+
+@caso("municipios_xlsx", repeticoes=3, aquecer=False)
+def _municipios_xlsx(ctx):
+    leitor_xlsx.ler_municipios_xlsx(ctx.municipios)
+
+
+@caso("municipios_cache_colunar")
+def _municipios_cache(ctx):
+    # O carregar_dados de hoje: colunas do .cache e a base em códigos inteiros
+    dados.BaseMunicipios(dados.carregar_colunas_municipios(ctx.municipios))
+
+
+@caso("indice_municipios")
+def _indice(ctx):
+    dados.IndiceMunicipios(ctx.base)
+
+
+@caso("saldo_csv")
+def _saldo_csv(ctx):
+    dados.ler_saldo(ctx.saldo)
+
+
+@caso("imigrantes_xlsx")
+def _imigrantes_xlsx(ctx):
+    dados.ler_imigrantes(ctx.imigrantes)
+
+
+@caso("matriz_regioes")
+def _matriz_regioes(ctx):
+    matriz_od.calcular_matriz_od(ctx.base, diagonal=False)
+
+
+@caso("matriz_municipio_uf")
+def _matriz_municipio_uf(ctx):
+    matriz_od.calcular_matriz_od(ctx.base, residencia="municipio", origem="uf")
+
+
+@caso("rotulos_municipio_uf")
+def _rotulos(ctx):
+    formatacao.rotulos_celulas(ctx.municipio_uf["pct_linha"].to_numpy(), ctx.municipio_uf["populacao"].to_numpy())
+
+
+@caso("consulta_hub")
+def _consulta_hub(ctx):
+    # O trabalho de uma seleção no hub, sem o Streamlit
+    for municipio in matriz_od.CAPITAIS:
+        resultado = ctx.indice.consultar(municipio)
+        formatacao.formatar_inteiros(resultado["População"])
+        formatacao.formatar_percentuais(resultado["Percentual"])
+
+
+@caso("rankings")
+def _rankings(ctx):
+    rankings.Rankings(ctx.indice)
+
+
+@caso("figura_saldo")
+def _figura_saldo(ctx):
+    figuras.figura_saldo(ctx.df_saldo)
+
+
+@caso("figura_mapa")
+def _figura_mapa(ctx):
+    figuras.figura_mapa(ctx.df_saldo)
+
+
+@caso("figura_matriz")
+def _figura_matriz(ctx):
+    figuras.figura_matriz(ctx.regioes["populacao"].T, ctx.regioes["pct_coluna"].T)
+
+
+@caso("figura_imigrantes")
+def _figura_imigrantes(ctx):
+    figuras.figura_imigrantes(ctx.df_imigrantes)
+
+
+@caso("sessao_primeira_execucao", repeticoes=3)
+def _sessao_primeira(ctx):
+    # Uma sessão nova com os caches do processo já quentes
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(SCRIPT, default_timeout=300)
+    at.run()
+    assert not at.exception, at.exception
+
+
+@caso("sessao_selecao_hub")
+def _sessao_selecao(ctx):
+    from streamlit.testing.v1 import AppTest
+
+    if not hasattr(ctx, "app"):
+        ctx.app = AppTest.from_file(SCRIPT, default_timeout=300)
+        ctx.app.run()
+        ctx.busca = 0
+    # Alterna o texto para que cada repetição seja mesmo uma nova seleção
+    ctx.busca += 1
+    ctx.app.text_input[0].input("porto alegre" if ctx.busca % 2 else "manaus").run()
+    assert not ctx.app.exception, ctx.app.exception
+
+
+# ---------------------------------------------------------------
+# MEDIÇÃO, HISTÓRICO E COMPARAÇÃO
+# ---------------------------------------------------------------
+
+def medir(funcao, ctx, repeticoes, aquecer):
+    if aquecer:
+        funcao(ctx)
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(ctx)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        "mediana_ms": statistics.median(tempos),
+        "minimo_ms": min(tempos),
+        "repeticoes": repeticoes,
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ambiente():
+    return {
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "maquina": platform.machine(),
+        "sistema": platform.system(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def comparar(resultados, base, tolerancia, tolerancias_caso, piso_ms):
+    """Casos que pioraram além da tolerância: [(nome, atual, base, variação)]."""
+    regressoes = []
+    for nome, medida in resultados.items():
+        anterior = base.get(nome)
+        if anterior is None:
+            continue
+        atual, antes = medida["mediana_ms"], anterior["mediana_ms"]
+        limite = tolerancias_caso.get(nome, tolerancia)
+        if atual > antes * (1 + limite) and atual - antes > piso_ms:
+            regressoes.append((nome, atual, antes, atual / antes - 1))
+    return regressoes
+
+
+def _tolerancia_caso(texto):
+    nome, _, valor = texto.partition("=")
+    if not valor:
+        raise argparse.ArgumentTypeError("use nome=fração, ex.: partida_fria=1.0")
+    return nome, float(valor)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks da página com histórico e linha de base.")
+    parser.add_argument("--casos", nargs="+", help="prefixos dos casos a rodar (padrão: todos)")
+    parser.add_argument("--listar", action="store_true", help="só lista os casos")
+    parser.add_argument("--historico", default=os.path.join(PASTA_RESULTADOS, "historico.jsonl"))
+    parser.add_argument("--base", default=os.path.join(PASTA_RESULTADOS, "linha_de_base.json"))
+    parser.add_argument("--salvar-base", action="store_true", help="grava esta execução como linha de base")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA,
+                        help="piora relativa aceita na mediana (0.25 = 25%%)")
+    parser.add_argument("--tolerancia-caso", type=_tolerancia_caso, action="append", default=[],
+                        metavar="NOME=FRAÇÃO", help="tolerância própria de um caso")
+    parser.add_argument("--piso-ms", type=float, default=PISO_MS,
+                        help="diferença absoluta mínima para contar como regressão")
+    args = parser.parse_args(argv)
+
+    nomes = [n for n in CASOS if not args.casos or n.startswith(tuple(args.casos))]
+    if args.listar:
+        print("\n".join(nomes))
+        return 0
+    if not nomes:
+        parser.error("nenhum caso corresponde aos prefixos informados")
+
+    # O script da página usa caminhos relativos à raiz do repositório
+    os.chdir(RAIZ)
+    # Os avisos do AppTest (modo "bare", depreciações) só poluiriam a tabela.
+    # O Streamlit reconfigura os níveis dos seus loggers a cada execução do
+    # script, então o corte é global
+    logging.disable(logging.WARNING)
+    ctx = Contexto()
+
+    try:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)["resultados"]
+    except (OSError, ValueError, KeyError):
+        base = {}
+
+    resultados = {}
+    print(f"{'caso':<28}{'mediana (ms)':>14}{'mínimo (ms)':>13}{'base (ms)':>11}{'variação':>10}")
+    for nome in nomes:
+        funcao, repeticoes, aquecer = CASOS[nome]
+        medida = medir(funcao, ctx, repeticoes, aquecer)
+        resultados[nome] = medida
+        anterior = base.get(nome, {}).get("mediana_ms")
+        coluna_base = f"{anterior:>11.1f}{medida['mediana_ms'] / anterior - 1:>+10.0%}" if anterior else f"{'—':>11}{'':>10}"
+        print(f"{nome:<28}{medida['mediana_ms']:>14.1f}{medida['minimo_ms']:>13.1f}{coluna_base}", flush=True)
+
+    registro = {"ambiente": ambiente(), "resultados": resultados}
+    os.makedirs(os.path.dirname(os.path.abspath(args.historico)), exist_ok=True)
+    with open(args.historico, "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    if args.salvar_base:
+        os.makedirs(os.path.dirname(os.path.abspath(args.base)), exist_ok=True)
+        with open(args.base + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(registro, f, ensure_ascii=False, indent=1)
+        os.replace(args.base + ".tmp", args.base)
+        print(f"\nlinha de base gravada em {os.path.relpath(args.base)}")
+        return 0
+
+    if not base:
+        print("\nsem linha de base para comparar (use --salvar-base)")
+        return 0
+
+    regressoes = comparar(resultados, base, args.tolerancia, dict(args.tolerancia_caso), args.piso_ms)
+    if regressoes:
+        print("\nREGRESSÕES:")
+        for nome, atual, antes, variacao in regressoes:
+            print(f"  {nome}: {antes:.1f} ms -> {atual:.1f} ms ({variacao:+.0%})")
+        return 1
+    print("\nsem regressões em relação à linha de base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import bisect
+import re
+
+import numpy as np
+
+from matriz_od import normalizar, uf_do_municipio
+
+# ---------------------------------------------------------------
+# BUSCA DE MUNICÍPIOS POR NOME
+# ---------------------------------------------------------------
+# Montada uma vez na carga. Os nomes são normalizados (sem acento, sem caixa,
+# sem o "(UF)" do fim) e indexados de dois jeitos: uma lista ordenada, para
+# achar por prefixo com bisect, e um dicionário de trigramas, para tolerar
+# digitação parcial ou no meio do nome ("alegre" acha "Porto Alegre").
+# Empates são desfeitos pela população, maior primeiro.
+
+_SUFIXO_UF = re.compile(r"\s*\([A-Z]{2}\)\s*$")
+_NAO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+
+# Pontuação de cada tipo de acerto; o trigrama soma de 0 a 1 por cima
+NOME_EXATO = 4.0
+PREFIXO_NOME = 3.0
+PREFIXO_PALAVRA = 2.0
+TRIGRAMAS_MINIMOS = 0.5
+
+
+def chave_busca(texto):
+    texto = normalizar(_SUFIXO_UF.sub("", texto))
+    return _NAO_ALFANUMERICO.sub(" ", texto).strip()
+
+
+def _trigramas(chave):
+    texto = f"  {chave} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceBusca:
+
+    def __init__(self, nomes, populacoes):
+        self.nomes = list(nomes)
+        self.ufs = np.array([uf_do_municipio(n) or "" for n in self.nomes])
+        self.populacao = np.asarray(populacoes, dtype=np.int64)
+        chaves = [chave_busca(n) for n in self.nomes]
+
+        # Prefixo do nome inteiro e de cada palavra a partir da segunda
+        entradas = []
+        for i, chave in enumerate(chaves):
+            palavras = chave.split(" ")
+            for p in range(len(palavras)):
+                entradas.append((" ".join(palavras[p:]), p > 0, i))
+        entradas.sort()
+        self._prefixos = [e[0] for e in entradas]
+        self._prefixo_palavra = np.array([e[1] for e in entradas])
+        self._prefixo_id = np.array([e[2] for e in entradas])
+
+        postagens = {}
+        for i, chave in enumerate(chaves):
+            for trigrama in _trigramas(chave):
+                postagens.setdefault(trigrama, []).append(i)
+        self._trigramas = {t: np.array(ids, dtype=np.int32) for t, ids in postagens.items()}
+        self._chaves = chaves
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def _por_prefixo(self, chave):
+        inicio = bisect.bisect_left(self._prefixos, chave)
+        fim = bisect.bisect_left(self._prefixos, chave + "\uffff")
+        return self._prefixo_id[inicio:fim], self._prefixo_palavra[inicio:fim]
+
+    def maiores(self, uf=None, k=10):
+        candidatos = np.flatnonzero(self.ufs == uf) if uf else np.arange(len(self.nomes))
+        ordem = np.argsort(-self.populacao[candidatos], kind="stable")
+        return [self.nomes[i] for i in candidatos[ordem[:k]]]
+
+    def buscar(self, texto, uf=None, k=10):
+        """Até k nomes de municípios que casam com o texto, do melhor para o pior."""
+        chave = chave_busca(texto)
+        if not chave:
+            return []
+
+        pontos = np.zeros(len(self.nomes))
+        ids, de_palavra = self._por_prefixo(chave)
+        pontos[ids[de_palavra]] = PREFIXO_PALAVRA
+        # Prefixo do nome vale mais que prefixo de palavra no meio do nome
+        np.maximum.at(pontos, ids[~de_palavra], PREFIXO_NOME)
+
+        trigramas = _trigramas(chave)
+        if len(chave) >= 3:
+            postagens = [self._trigramas[t] for t in trigramas if t in self._trigramas]
+            if postagens:
+                acertos = np.bincount(np.concatenate(postagens), minlength=len(self.nomes))
+                fracao = acertos / len(trigramas)
+                pontos += np.where(fracao >= TRIGRAMAS_MINIMOS, fracao, 0)
+
+        candidatos = np.flatnonzero(pontos > 0)
+        if uf:
+            candidatos = candidatos[self.ufs[candidatos] == uf]
+        if len(candidatos) == 0:
+            return []
+
+        exatos = [i for i in candidatos[pontos[candidatos] >= PREFIXO_NOME] if self._chaves[i] == chave]
+        pontos[exatos] = NOME_EXATO + 1
+
+        # Ordena por pontos e, no empate, pela maior população
+        ordem = np.lexsort((-self.populacao[candidatos], -pontos[candidatos]))
+        return [self.nomes[i] for i in candidatos[ordem[:k]]]
+
+    def exatos(self, texto):
+        """Municípios cujo nome é exatamente o texto, sem contar acento, caixa e
+        pontuação; um "(UF)" no fim restringe a busca àquela UF."""
+        chave = chave_busca(texto)
+        if not chave:
+            return []
+        ids, de_palavra = self._por_prefixo(chave)
+        ids = [i for i in ids[~de_palavra] if self._chaves[i] == chave]
+        uf = uf_do_municipio(texto.strip())
+        if uf:
+            ids = [i for i in ids if self.ufs[i] == uf]
+        return [self.nomes[i] for i in sorted(ids, key=lambda i: -self.populacao[i])]
+
+    def resolver(self, textos):
+        """Município de cada texto digitado; devolve (achados, não achados).
+
+        Só vale o nome exato (ver exatos): "Paris" não vira Parisi (SP), e um
+        nome com homônimos em outras UFs precisa do "(UF)". O que não casar
+        fica nos não achados; sugerir() dá as aproximações para mostrar.
+        """
+        achados, nao_achados = [], []
+        for texto in textos:
+            exatos = self.exatos(texto)
+            if len(exatos) == 1:
+                if exatos[0] not in achados:
+                    achados.append(exatos[0])
+            else:
+                nao_achados.append(texto)
+        return achados, nao_achados
+
+    def sugerir(self, texto, k=3):
+        """Nomes parecidos com um texto que não foi resolvido."""
+        exatos = self.exatos(texto)
+        if len(exatos) > 1:
+            return exatos[:k]
+        return self.buscar(texto, uf_do_municipio(texto.strip()), k=k)
@@ -0,0 +1,365 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import busca
+import dados
+import matriz_od
+
+# ---------------------------------------------------------------
+# SERVIÇO DE CONSULTA SEM A INTERFACE
+# ---------------------------------------------------------------
+# O mesmo acesso aos dados da página, sem passar pelo script do Streamlit:
+# painéis internos, relatórios em lote e testes de carga importam Consultas
+# ou falam com o servidor HTTP local. Importar o módulo não lê nada; a base
+# municipal é carregada uma vez, na primeira consulta, e recarregada só
+# quando o arquivo muda. As respostas já serializadas em JSON ficam num
+# cache LRU limitado em bytes.
+#
+#   python consulta.py municipio "porto alegre"
+#   python consulta.py sugestoes floripa
+#   python consulta.py lote "Porto Alegre" "Caxias do Sul (RS)"
+#   python consulta.py matriz --residencia uf --origem regiao
+#   python consulta.py saldo
+#   python consulta.py servir --porta 8000
+#
+# Rotas: /municipio?nome=..., /lote?nome=...&nome=..., /matriz?residencia=
+# &origem=&diagonal=&valor=, /saldo, /sugestoes?nome=...&k= e /saude.
+#
+# /municipio e /lote só aceitam o nome exato (sem contar acento, caixa e
+# pontuação; homônimos precisam do "(UF)"): um nome desconhecido dá 404, com
+# sugestões no corpo, e nunca os dados de outro município. A busca aproximada
+# fica em /sugestoes, que devolve só nomes.
+
+PASTA_DADOS = os.path.dirname(os.path.abspath(__file__))
+VALORES_MATRIZ = ("populacao", "pct_residentes", "pct_linha", "pct_coluna")
+
+_log = logging.getLogger(__name__)
+
+
+class MunicipioNaoEncontrado(KeyError):
+
+    def __init__(self, nome, sugestoes):
+        super().__init__(f"município não encontrado: {nome}")
+        self.sugestoes = sugestoes
+
+
+class CacheLRU:
+    """Cache de respostas com descarte do menos usado, limitado em bytes."""
+
+    def __init__(self, limite_bytes=32 * 1024 * 1024):
+        self.limite_bytes = limite_bytes
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+        self.bytes = 0
+        self.acertos = 0
+        self.faltas = 0
+        self.descartes = 0
+
+    def __len__(self):
+        return len(self._itens)
+
+    def obter(self, chave, gerar):
+        with self._trava:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave]
+            self.faltas += 1
+
+        # Gera fora da trava: consultas diferentes não esperam umas pelas outras
+        conteudo = gerar()
+        with self._trava:
+            if chave not in self._itens and len(conteudo) <= self.limite_bytes:
+                self._itens[chave] = conteudo
+                self.bytes += len(conteudo)
+                while self.bytes > self.limite_bytes:
+                    _, antigo = self._itens.popitem(last=False)
+                    self.bytes -= len(antigo)
+                    self.descartes += 1
+        return conteudo
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self.bytes = 0
+
+
+def _json(valor):
+    return json.dumps(valor, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class Consultas:
+
+    def __init__(self, pasta=PASTA_DADOS, limite_cache=32 * 1024 * 1024):
+        self.caminho_municipios = os.path.join(pasta, "municipios.xlsx")
+        self.caminho_saldo = os.path.join(pasta, "saldo_migratorio_estados.csv")
+        self.cache = CacheLRU(limite_cache)
+        self._trava = threading.Lock()
+        self._versao = None
+        self._indice = None
+        self._busca = None
+
+    def _carregar(self):
+        # Um stat por consulta; a base só é remontada se o arquivo mudou
+        versao = dados.versao_arquivo(self.caminho_municipios)
+        with self._trava:
+            if versao != self._versao:
+                indice = dados.IndiceMunicipios(dados.base_municipios(self.caminho_municipios))
+                self._busca = busca.IndiceBusca(indice.base.municipios, indice.total)
+                self._indice = indice
+                self._versao = versao
+            return versao, self._indice, self._busca
+
+    def _resolver(self, indice, busca_municipios, nome):
+        if nome in indice.codigo:
+            return nome
+        exatos = busca_municipios.exatos(nome)
+        if len(exatos) != 1:
+            raise MunicipioNaoEncontrado(nome, busca_municipios.sugerir(nome))
+        return exatos[0]
+
+    # Consultas que devolvem estruturas prontas para JSON
+
+    def municipio(self, nome):
+        _, indice, busca_municipios = self._carregar()
+        municipio = self._resolver(indice, busca_municipios, nome)
+        resultado = indice.consultar(municipio)
+        return {
+            "municipio": municipio,
+            "total": resultado["total"],
+            "maior": resultado["maior"],
+            "migrantes": resultado["migrantes"],
+            "origens": [
+                {"origem": o, "populacao": p, "percentual": c}
+                for o, p, c in zip(resultado["Origem"].tolist(),
+                                   resultado["População"].tolist(),
+                                   resultado["Percentual"].tolist())
+            ],
+        }
+
+    def lote(self, nomes):
+        _, indice, busca_municipios = self._carregar()
+        encontrados, nao_encontrados = [], []
+        for nome in nomes:
+            try:
+                municipio = self._resolver(indice, busca_municipios, nome)
+            except MunicipioNaoEncontrado:
+                nao_encontrados.append(nome)
+                continue
+            if municipio not in encontrados:
+                encontrados.append(municipio)
+        resumo = indice.comparar(encontrados)["resumo"] if encontrados else None
+        return {
+            "municipios": [] if resumo is None else resumo.reset_index().to_dict("records"),
+            "nao_encontrados": nao_encontrados,
+            "sugestoes": {nome: busca_municipios.sugerir(nome) for nome in nao_encontrados},
+        }
+
+    def sugestoes(self, nome, k=5):
+        """Busca aproximada: só nomes, para o cliente escolher e pedir de novo."""
+        _, _, busca_municipios = self._carregar()
+        return {"nome": nome, "aproximado": True, "sugestoes": busca_municipios.sugerir(nome, k)}
+
+    def matriz(self, residencia="regiao", origem="regiao", diagonal=True, valor="populacao"):
+        if valor not in VALORES_MATRIZ:
+            raise ValueError(f"valor inválido: {valor}")
+        _, indice, _ = self._carregar()
+        quadro = matriz_od.calcular_matriz_od(indice.base, residencia, origem, diagonal)[valor]
+        return {
+            "residencia": quadro.index.tolist(),
+            "origem": quadro.columns.tolist(),
+            "valores": quadro.to_numpy().tolist(),
+        }
+
+    def saldo(self):
+        df_saldo = dados.ler_saldo(self.caminho_saldo)
+        colunas = ["uf", "estado_nome", "imigrantes", "emigrantes", "saldo_migratorio", "pop_resident", "taxa_migra"]
+        return df_saldo[colunas].rename(columns={"estado_nome": "estado"}).to_dict("records")
+
+    def saude(self):
+        return {
+            "carregado": self._versao is not None,
+            "cache": {
+                "itens": len(self.cache),
+                "bytes": self.cache.bytes,
+                "acertos": self.cache.acertos,
+                "faltas": self.cache.faltas,
+                "descartes": self.cache.descartes,
+            },
+        }
+
+    # Rotas do servidor: parâmetros de query string -> JSON em bytes
+
+    def responder(self, rota, parametros):
+        """Resposta JSON (bytes) de uma rota; as rotas de dados passam pelo cache.
+
+        Levanta LookupError para rota ou município desconhecido e ValueError
+        para parâmetro inválido.
+        """
+        if rota == "/saude":
+            return _json(self.saude())
+
+        def um(nome, padrao=None):
+            valores = parametros.get(nome)
+            return valores[-1] if valores else padrao
+
+        if rota == "/municipio":
+            nome = um("nome")
+            if not nome:
+                raise ValueError("informe o parâmetro nome")
+            gerar = lambda: _json(self.municipio(nome))
+            argumentos = (nome,)
+        elif rota == "/lote":
+            nomes = [n for valor in parametros.get("nome", []) for n in valor.split(";") if n.strip()]
+            if not nomes:
+                raise ValueError("informe ao menos um parâmetro nome")
+            gerar = lambda: _json(self.lote(nomes))
+            argumentos = tuple(nomes)
+        elif rota == "/matriz":
+            residencia, origem, valor = um("residencia", "regiao"), um("origem", "regiao"), um("valor", "populacao")
+            diagonal = um("diagonal", "1") not in ("0", "false", "nao")
+            gerar = lambda: _json(self.matriz(residencia, origem, diagonal, valor))
+            argumentos = (residencia, origem, diagonal, valor)
+        elif rota == "/saldo":
+            gerar = lambda: _json(self.saldo())
+            argumentos = ()
+        elif rota == "/sugestoes":
+            nome = um("nome")
+            if not nome:
+                raise ValueError("informe o parâmetro nome")
+            try:
+                k = int(um("k", "5"))
+            except ValueError:
+                raise ValueError("k deve ser inteiro")
+            gerar = lambda: _json(self.sugestoes(nome, k))
+            argumentos = (nome, k)
+        else:
+            raise LookupError(f"rota desconhecida: {rota}")
+
+        if rota == "/saldo":
+            versao = dados.versao_arquivo(self.caminho_saldo)
+        else:
+            versao = self._carregar()[0]
+        return self.cache.obter((rota, argumentos, versao), gerar)
+
+
+# ---------------------------------------------------------------
+# SERVIDOR HTTP LOCAL
+# ---------------------------------------------------------------
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Cabeçalho e corpo saem em escritas separadas; com Nagle ligado, cada
+    # resposta numa conexão persistente esperava o ACK atrasado (~40 ms)
+    disable_nagle_algorithm = True
+    consultas = None
+
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        try:
+            corpo = self.consultas.responder(partes.path.rstrip("/") or "/", parse_qs(partes.query))
+            status = 200
+        except MunicipioNaoEncontrado as erro:
+            corpo, status = _json({"erro": erro.args[0], "sugestoes": erro.sugestoes}), 404
+        except LookupError as erro:
+            corpo, status = _json({"erro": erro.args[0]}), 404
+        except ValueError as erro:
+            corpo, status = _json({"erro": str(erro)}), 400
+        except Exception as erro:  # noqa: BLE001 - o cliente sempre recebe uma resposta
+            # Planilha sumida ou trocada no meio da leitura, CSV malformado...
+            _log.exception("falha ao responder %s", self.path)
+            corpo, status = _json({"erro": f"erro interno: {type(erro).__name__}"}), 500
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def criar_servidor(consultas, host="127.0.0.1", porta=8000):
+    manipulador = type("Manipulador", (_Manipulador,), {"consultas": consultas})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+# ---------------------------------------------------------------
+# LINHA DE COMANDO
+# ---------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consultas aos dados de migração sem a interface.")
+    parser.add_argument("--pasta", default=PASTA_DADOS, help="pasta com os arquivos de dados")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    servir = comandos.add_parser("servir", help="sobe o servidor HTTP local")
+    servir.add_argument("--host", default="127.0.0.1")
+    servir.add_argument("--porta", type=int, default=8000, help="0 escolhe uma porta livre")
+    servir.add_argument("--cache-mb", type=float, default=32)
+
+    municipio = comandos.add_parser("municipio", help="origens de um município")
+    municipio.add_argument("nome")
+
+    lote = comandos.add_parser("lote", help="resumo de vários municípios")
+    lote.add_argument("nomes", nargs="+")
+
+    matriz = comandos.add_parser("matriz", help="matriz origem-destino")
+    matriz.add_argument("--residencia", choices=matriz_od.NIVEIS_RESIDENCIA, default="regiao")
+    matriz.add_argument("--origem", choices=matriz_od.NIVEIS_ORIGEM, default="regiao")
+    matriz.add_argument("--sem-diagonal", action="store_true")
+    matriz.add_argument("--valor", choices=VALORES_MATRIZ, default="populacao")
+
+    comandos.add_parser("saldo", help="saldo migratório por UF")
+
+    sugestoes = comandos.add_parser("sugestoes", help="nomes de municípios parecidos com o texto")
+    sugestoes.add_argument("nome")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "servir":
+        consultas = Consultas(args.pasta, int(args.cache_mb * 1024 * 1024))
+        servidor = criar_servidor(consultas, args.host, args.porta)
+        host, porta = servidor.server_address[:2]
+        print(f"servindo em http://{host}:{porta}", flush=True)
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
+        return 0
+
+    consultas = Consultas(args.pasta)
+    try:
+        if args.comando == "municipio":
+            resultado = consultas.municipio(args.nome)
+        elif args.comando == "lote":
+            resultado = consultas.lote(args.nomes)
+        elif args.comando == "sugestoes":
+            resultado = consultas.sugestoes(args.nome)
+        elif args.comando == "matriz":
+            resultado = consultas.matriz(args.residencia, args.origem, not args.sem_diagonal, args.valor)
+        else:
+            resultado = consultas.saldo()
+    except (LookupError, ValueError) as erro:
+        print(erro.args[0] if isinstance(erro, KeyError) else erro, file=sys.stderr)
+        if getattr(erro, "sugestoes", None):
+            print("sugestões: " + ", ".join(erro.sugestoes), file=sys.stderr)
+        return 1
+    json.dump(resultado, sys.stdout, ensure_ascii=False, indent=1)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,374 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+import formatacao
+from leitor_xlsx import ler_municipios_xlsx
+from matriz_od import UFS
+
+# ---------------------------------------------------------------
+# CACHE COLUNAR DO MUNICIPIOS.XLSX
+# ---------------------------------------------------------------
+# A planilha tem ~167 mil linhas e o sheet1.xml descompactado passa de 25 MB;
+# mesmo com o leitor incremental (leitor_xlsx.py) isso leva segundos. Guardamos as colunas já convertidas em
+# arquivos .npy ao lado da fonte, numa pasta .cache, e só relemos o Excel
+# quando o arquivo muda (caminho, tamanho, mtime e hash do conteúdo).
+
+PASTA_CACHE = ".cache"
+VERSAO_CACHE = 2
+
+
+def hash_arquivo(caminho):
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def impressao_digital(caminho, sha256=None):
+    info = os.stat(caminho)
+    return {
+        "caminho": os.path.abspath(caminho),
+        "tamanho": info.st_size,
+        "mtime_ns": info.st_mtime_ns,
+        "sha256": sha256 or hash_arquivo(caminho),
+    }
+
+
+def versao_arquivo(caminho):
+    # Chave barata (só um stat) para invalidar caches quando o arquivo muda
+    info = os.stat(caminho)
+    return (os.path.abspath(caminho), info.st_size, info.st_mtime_ns)
+
+
+def _pasta_cache(caminho):
+    return os.path.join(os.path.dirname(os.path.abspath(caminho)), PASTA_CACHE)
+
+
+def _caminho_meta(caminho):
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    return os.path.join(_pasta_cache(caminho), nome + ".json")
+
+
+def _ler_meta(caminho):
+    try:
+        with open(_caminho_meta(caminho), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("versao") != VERSAO_CACHE:
+        return None
+    return meta
+
+
+def _gravar_meta(caminho, meta):
+    destino = _caminho_meta(caminho)
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(temporario, destino)
+
+
+def _cache_valido(caminho, meta):
+    # Caminho rápido: mesmo tamanho e mtime dispensam o hash. Se só o mtime
+    # mudou (um "touch", um checkout), o hash decide e o cache é reaproveitado.
+    if meta is None:
+        return False
+    anterior = meta["fonte"]
+    info = os.stat(caminho)
+    if anterior["caminho"] != os.path.abspath(caminho):
+        return False
+    if anterior["tamanho"] == info.st_size and anterior["mtime_ns"] == info.st_mtime_ns:
+        return True
+    if anterior["tamanho"] != info.st_size:
+        return False
+    sha = hash_arquivo(caminho)
+    if sha != anterior["sha256"]:
+        return False
+    meta["fonte"] = impressao_digital(caminho, sha)
+    try:
+        _gravar_meta(caminho, meta)
+    except OSError:
+        # Cache somente leitura: continua válido, só refaz o hash na próxima vez
+        pass
+    return True
+
+
+def _gravar_array(destino, array):
+    # Arquivo completo ou nenhum: outro processo pode estar com o anterior
+    # aberto em mmap, e um .npy pela metade não pode ficar no lugar dele
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    with open(temporario, "wb") as f:
+        np.save(f, array)
+    os.replace(temporario, destino)
+
+
+def _gravar_cache(caminho, tabela):
+    fonte = impressao_digital(caminho)
+
+    pasta = os.path.join(_pasta_cache(caminho), fonte["sha256"][:16])
+    os.makedirs(pasta, exist_ok=True)
+    for coluna in ("municipio", "origem", "populacao"):
+        _gravar_array(os.path.join(pasta, f"{coluna}.npy"), tabela[coluna])
+
+    anterior = _ler_meta(caminho)
+    _gravar_meta(caminho, {
+        "versao": VERSAO_CACHE,
+        "fonte": fonte,
+        "pasta": os.path.basename(pasta),
+        "municipios": tabela["municipios"],
+        "origens": tabela["origens"],
+    })
+    if anterior and anterior.get("pasta") != os.path.basename(pasta):
+        shutil.rmtree(os.path.join(_pasta_cache(caminho), anterior["pasta"]), ignore_errors=True)
+
+
+def _ler_cache(caminho, meta):
+    pasta = os.path.join(_pasta_cache(caminho), meta["pasta"])
+    return {
+        "municipio": np.load(os.path.join(pasta, "municipio.npy"), mmap_mode="r"),
+        "origem": np.load(os.path.join(pasta, "origem.npy"), mmap_mode="r"),
+        "populacao": np.load(os.path.join(pasta, "populacao.npy"), mmap_mode="r"),
+        "municipios": meta["municipios"],
+        "origens": meta["origens"],
+    }
+
+
+def carregar_colunas_municipios(caminho):
+    meta = _ler_meta(caminho)
+    if _cache_valido(caminho, meta):
+        try:
+            return _ler_cache(caminho, meta)
+        except (OSError, ValueError):
+            # Arquivo sumido ou .npy truncado/corrompido: refaz a partir da planilha
+            pass
+    tabela = ler_municipios_xlsx(caminho)
+    try:
+        _gravar_cache(caminho, tabela)
+    except OSError:
+        # Sem permissão de escrita (pod somente leitura): segue sem cache
+        pass
+    return tabela
+
+
+# ---------------------------------------------------------------
+# BASE COMPARTILHADA (CÓDIGOS INTEIROS, SOMENTE LEITURA)
+# ---------------------------------------------------------------
+# Município e Origem viram códigos inteiros que apontam para duas tuplas de
+# nomes; População fica em int32. Os arrays são marcados como somente leitura
+# e existe uma única instância por arquivo no processo, compartilhada por
+# todas as sessões em vez de uma cópia desserializada para cada uma.
+
+def _menor_inteiro(quantidade):
+    for tipo in (np.int8, np.int16, np.int32):
+        if quantidade <= np.iinfo(tipo).max:
+            return tipo
+    return np.int64
+
+
+def _somente_leitura(valores):
+    valores = np.ascontiguousarray(valores)
+    valores.setflags(write=False)
+    return valores
+
+
+class BaseMunicipios:
+
+    def __init__(self, tabela, fonte=None):
+        municipio = np.asarray(tabela["municipio"])
+        origem = np.asarray(tabela["origem"])
+        populacao = np.asarray(tabela["populacao"])
+
+        # Linhas sem origem (o rodapé "Fonte: IBGE") não são municípios.
+        # As linhas ficam agrupadas por município e, dentro de cada grupo,
+        # da maior para a menor população (ver IndiceMunicipios).
+        validas = np.flatnonzero(origem >= 0)
+        ordem = validas[np.lexsort((-populacao[validas], municipio[validas]))]
+
+        usados = np.unique(municipio[ordem])
+        novo_codigo = np.full(len(tabela["municipios"]), -1, dtype=np.int64)
+        novo_codigo[usados] = np.arange(len(usados))
+
+        self.municipios = tuple(tabela["municipios"][i] for i in usados)
+        self.origens = tuple(tabela["origens"])
+        self.municipio = _somente_leitura(
+            novo_codigo[municipio[ordem]].astype(_menor_inteiro(len(self.municipios))))
+        self.origem = _somente_leitura(origem[ordem].astype(_menor_inteiro(len(self.origens))))
+        self.populacao = _somente_leitura(populacao[ordem].astype(np.int32))
+        self.fonte = fonte
+
+    def __len__(self):
+        return len(self.populacao)
+
+    @property
+    def nbytes(self):
+        return self.municipio.nbytes + self.origem.nbytes + self.populacao.nbytes
+
+    def para_dataframe(self):
+        return pd.DataFrame({
+            "Município": pd.Categorical.from_codes(self.municipio, self.municipios),
+            "Origem": pd.Categorical.from_codes(self.origem, self.origens),
+            "População": self.populacao,
+        })
+
+
+_bases = {}
+_trava_bases = threading.Lock()
+
+
+def base_municipios(caminho):
+    chave = os.path.abspath(caminho)
+    versao = versao_arquivo(caminho)
+    with _trava_bases:
+        if chave not in _bases or _bases[chave][0] != versao:
+            tabela = carregar_colunas_municipios(caminho)
+            meta = _ler_meta(caminho)
+            _bases[chave] = (versao, BaseMunicipios(tabela, meta["fonte"] if meta else None))
+        return _bases[chave][1]
+
+
+# ---------------------------------------------------------------
+# ÍNDICE POR MUNICÍPIO
+# ---------------------------------------------------------------
+# Montado uma vez na carga sobre a BaseMunicipios, cujas linhas já vêm
+# agrupadas por município e ordenadas da maior para a menor população. Cada
+# município vira uma faixa contígua [inicio, fim) e a consulta é só um
+# fatiamento, sem varrer a tabela nem ordenar nada a cada seleção.
+
+class IndiceMunicipios:
+
+    def __init__(self, base):
+        self.base = base
+        n = len(base.municipios)
+        contagem = np.bincount(base.municipio, minlength=n)
+        self.fim = _somente_leitura(np.cumsum(contagem))
+        self.inicio = _somente_leitura(self.fim - contagem)
+
+        total = np.bincount(base.municipio, weights=base.populacao, minlength=n).astype(np.int64)
+        # Grupos em ordem decrescente: a primeira linha de cada um é a maior
+        maior = base.populacao[self.inicio].astype(np.int64)
+        self.total = _somente_leitura(total)
+        self.maior = _somente_leitura(maior)
+        self.migrantes = _somente_leitura(total - maior)
+
+        total_linha = total[base.municipio]
+        self.percentual = _somente_leitura(np.divide(
+            base.populacao * 100.0, total_linha,
+            out=np.zeros(len(base)), where=total_linha > 0,
+        ))
+
+        # Matriz densa município x origem, somada numa passada só; é dela que
+        # saem as comparações em lote
+        n_origens = len(base.origens)
+        plano = base.municipio.astype(np.int64) * n_origens + base.origem
+        self.matriz = _somente_leitura(
+            np.bincount(plano, weights=base.populacao, minlength=n * n_origens)
+            .reshape(n, n_origens).astype(np.int64)
+        )
+        self.maior_origem = _somente_leitura(base.origem[self.inicio])
+
+        self._origens = np.asarray(base.origens, dtype=object)
+        self.codigo = {nome: i for i, nome in enumerate(base.municipios)}
+
+    def consultar(self, municipio):
+        i = self.codigo[municipio]
+        faixa = slice(self.inicio[i], self.fim[i])
+        return {
+            "Origem": self._origens[self.base.origem[faixa]],
+            "População": self.base.populacao[faixa],
+            "Percentual": self.percentual[faixa],
+            "total": int(self.total[i]),
+            "maior": int(self.maior[i]),
+            "migrantes": int(self.migrantes[i]),
+        }
+
+    def codigos(self, municipios):
+        desconhecidos = [m for m in municipios if m not in self.codigo]
+        if desconhecidos:
+            raise KeyError(f"municípios não encontrados: {', '.join(desconhecidos)}")
+        return np.array([self.codigo[m] for m in municipios], dtype=np.int64)
+
+    def comparar(self, municipios):
+        """Origens, migrantes e percentuais de vários municípios de uma vez.
+
+        Tudo sai de uma indexação da matriz município x origem, então o custo
+        praticamente não depende de quantos municípios são pedidos. Devolve
+        "resumo" (uma linha por município), "populacao" e "percentual"
+        (município x origem) e "origens" (formato longo, bom para CSV).
+        """
+        codigos = self.codigos(municipios)
+        nomes = pd.Index([self.base.municipios[c] for c in codigos], name="Município")
+        origens = pd.Index(self.base.origens, name="Origem")
+        total = self.total[codigos]
+        populacao = self.matriz[codigos]
+        percentual = np.divide(
+            populacao * 100.0, total[:, None],
+            out=np.zeros(populacao.shape), where=total[:, None] > 0,
+        )
+        migrantes = self.migrantes[codigos]
+
+        resumo = pd.DataFrame({
+            "População total": total,
+            "Maior origem": self._origens[self.maior_origem[codigos]],
+            "População da maior origem": self.maior[codigos],
+            "Migrantes": migrantes,
+            "Percentual de migrantes": np.divide(
+                migrantes * 100.0, total, out=np.zeros(len(total)), where=total > 0
+            ),
+        }, index=nomes)
+
+        n_origens = len(origens)
+        longo = pd.DataFrame({
+            "Município": np.repeat(nomes.to_numpy(), n_origens),
+            "Origem": np.tile(origens.to_numpy(), len(nomes)),
+            "População": populacao.ravel(),
+            "Percentual": percentual.ravel(),
+        })
+
+        return {
+            "resumo": resumo,
+            "populacao": pd.DataFrame(populacao, index=nomes, columns=origens),
+            "percentual": pd.DataFrame(percentual, index=nomes, columns=origens),
+            "origens": longo,
+        }
+
+
+# ---------------------------------------------------------------
+# SALDO MIGRATÓRIO E IMIGRANTES
+# ---------------------------------------------------------------
+
+nomes_estados = {sigla: nome for sigla, (nome, _) in UFS.items()}
+
+PAISES_IMIGRANTES = ["Venezuela", "Portugal", "Bolívia", "Colômbia", "Haiti", "Paraguai", "Argentina", "Japão", "Itália", "China", "Uruguai", "Peru", "Estados Unidos", "Angola"]
+
+
+def ler_saldo(caminho):
+    df_saldo = pd.read_csv(caminho)
+    df_saldo = df_saldo[df_saldo['uf'] != 'BR']
+    df_saldo = df_saldo.loc[:, ~df_saldo.columns.str.contains('^Unnamed')]
+    df_saldo['taxa_migra'] = df_saldo['taxa_migra'].str.replace("%", "").str.replace(",", ".")
+    df_saldo['taxa_migra'] = pd.to_numeric(df_saldo["taxa_migra"]) / 100
+
+    df_saldo = df_saldo.sort_values("saldo_migratorio", ascending=True)
+    df_saldo["saldo_formatado"] = formatacao.formatar_inteiros(df_saldo["saldo_migratorio"])
+    df_saldo["estado_nome"] = df_saldo["uf"].map(nomes_estados)
+    df_saldo["taxa_formatada"] = formatacao.formatar_percentuais(df_saldo["taxa_migra"] * 100)
+    df_saldo["imigrantes_fmt"] = formatacao.formatar_inteiros(df_saldo["imigrantes"])
+    df_saldo["emigrantes_fmt"] = formatacao.formatar_inteiros(df_saldo["emigrantes"])
+    df_saldo["saldo_fmt"] = formatacao.formatar_inteiros(df_saldo["saldo_migratorio"])
+    return df_saldo
+
+
+def ler_imigrantes(caminho):
+    df_imigr = pd.read_excel(caminho)
+    df_imigr.columns = [str(col).strip() for col in df_imigr.columns]
+    df_imigr = df_imigr[~df_imigr["País/Região"].str.contains("Total", case=False, na=False)]
+    df_imigr = df_imigr[df_imigr["País/Região"].isin(PAISES_IMIGRANTES)]
+    df_imigr = df_imigr[["País/Região", "2010", "2022"]]
+    return df_imigr.melt(id_vars="País/Região", var_name="Ano", value_name="População")
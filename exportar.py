@@ -0,0 +1,513 @@
+import argparse
+import gzip
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import time
+
+import plotly
+from PIL import Image
+
+import artefatos
+import imagens
+import matriz_od
+
+# ---------------------------------------------------------------
+# EXPORTAÇÃO ESTÁTICA DO ESPECIAL
+# ---------------------------------------------------------------
+# A maior parte dos leitores só lê o texto e vê os quatro gráficos, que são
+# iguais para todo mundo, mas cada um segurava uma sessão do Streamlit e CPU
+# do servidor. Este comando roda o script da página uma vez (AppTest), percorre
+# os elementos que ele produziu e grava uma página HTML estática:
+#
+#   - texto, títulos, legendas e o bloco expansível da matriz, na ordem do
+#     script, então o texto do especial continua tendo uma fonte só;
+#   - fotos com todas as variantes WebP (srcset) de imagens.py;
+#   - gráficos com o mesmo JSON do Plotly que a página manda ao navegador,
+#     desenhados pelo plotly.js do pacote plotly quando chegam perto da tela;
+#   - o hub de municípios, com a busca feita no navegador: um índice compacto
+#     de nomes e populações e um arquivo JSON por UF com as origens de cada
+#     município, baixado só quando um município daquela UF é escolhido.
+#
+# Comparação e rankings continuam só na versão ao vivo (--url-app põe o link).
+# Fora o index.html, todo arquivo tem o hash do conteúdo no nome e pode ser
+# servido com cache imutável; .gz ao lado dos textos serve para servidores
+# que entregam a versão pré-comprimida. Nenhum Python no caminho da requisição:
+#
+#   python exportar.py [--saida estatico] [--url-app https://...]
+#   python -m http.server -d estatico
+
+PASTA_DADOS = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_PAGINA = "streamlitidp.py"
+PLOTLY_JS = os.path.join(os.path.dirname(plotly.__file__), "package_data", "plotly.min.js")
+
+# Textos a partir deste tamanho ganham uma cópia .gz
+GZIP_MINIMO = 1024
+EXTENSOES_GZIP = (".html", ".js", ".css", ".json")
+
+_NEGRITO = re.compile(r"\*\*(.+?)\*\*")
+
+
+def _hash(conteudo):
+    return hashlib.sha256(conteudo).hexdigest()[:12]
+
+
+class Saida:
+    """Grava os arquivos do site; os de conteúdo levam o hash no nome."""
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self.tamanhos = {}
+
+    def gravar(self, caminho, conteudo):
+        if isinstance(conteudo, str):
+            conteudo = conteudo.encode("utf-8")
+        destino = os.path.join(self.pasta, caminho)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with open(destino, "wb") as f:
+            f.write(conteudo)
+        if caminho.endswith(EXTENSOES_GZIP) and len(conteudo) >= GZIP_MINIMO:
+            with open(destino + ".gz", "wb") as f:
+                f.write(gzip.compress(conteudo, 9, mtime=0))
+        self.tamanhos[caminho] = len(conteudo)
+        return caminho
+
+    def gravar_versionado(self, pasta, nome, extensao, conteudo):
+        if isinstance(conteudo, str):
+            conteudo = conteudo.encode("utf-8")
+        return self.gravar(f"{pasta}/{nome}-{_hash(conteudo)}{extensao}", conteudo)
+
+    def copiar_versionado(self, pasta, caminho):
+        nome, extensao = os.path.splitext(os.path.basename(caminho))
+        with open(caminho, "rb") as f:
+            return self.gravar_versionado(pasta, nome, extensao, f.read())
+
+
+def _json(valor):
+    return json.dumps(valor, ensure_ascii=False, separators=(",", ":"))
+
+
+# ---------------------------------------------------------------
+# ELEMENTOS DA PÁGINA
+# ---------------------------------------------------------------
+
+def elementos_pagina(pasta=PASTA_DADOS, tempo_limite=300):
+    """Elementos de primeiro nível de uma execução do script da página e o
+    arquivo de cada foto, pela legenda."""
+    from streamlit.testing.v1 import AppTest
+
+    anterior = os.getcwd()
+    # O script abre os dados por caminhos relativos à pasta dele
+    os.chdir(pasta)
+    try:
+        at = AppTest.from_file(os.path.join(pasta, SCRIPT_PAGINA), default_timeout=tempo_limite)
+        at.run()
+    finally:
+        os.chdir(anterior)
+    if at.exception:
+        raise RuntimeError(f"o script da página falhou: {at.exception[0].message}")
+    return list(at.main.children.values()), dict(at.session_state["fotos_pagina"])
+
+
+def _descendentes(elemento):
+    for filho in getattr(elemento, "children", {}).values():
+        yield filho
+        yield from _descendentes(filho)
+
+
+def _markdown(texto):
+    # O texto do especial só usa negrito e itens de lista "- "
+    return _NEGRITO.sub(r"<strong>\1</strong>", html.escape(texto, quote=False))
+
+
+def _foto(saida, caminho, legenda, primeira):
+    # Sem srcset, o navegador fica com a mesma variante que a página escolhe.
+    # Se não deu para gerar variantes, a página mostra o original, e o site também
+    exibida = imagens.variante(caminho)
+    variantes = {} if exibida == caminho else imagens.preparar(caminho)
+    urls = {largura: saida.copiar_versionado("imagens", v) for largura, v in sorted(variantes.items())}
+    padrao = next((urls[w] for w, v in variantes.items() if v == exibida), None)
+    if padrao is None:
+        padrao = saida.copiar_versionado("imagens", exibida)
+    with Image.open(exibida) as foto:
+        largura, altura = foto.size
+    srcset = ""
+    if urls:
+        lista = ", ".join(f"{url} {w}w" for w, url in urls.items())
+        srcset = (f' srcset="{lista}" '
+                  f'sizes="(max-width: {imagens.LARGURA_COLUNA}px) 100vw, {imagens.LARGURA_COLUNA}px"')
+    carregamento = "eager" if primeira else "lazy"
+    return (
+        f'<figure><img src="{padrao}"{srcset} '
+        f'width="{largura}" height="{altura}" alt="{html.escape(legenda)}" loading="{carregamento}" decoding="async">'
+        f"<figcaption>{html.escape(legenda)}</figcaption></figure>"
+    )
+
+
+def _grafico(saida, proto, numero):
+    spec = json.loads(proto.spec)
+    layout = spec.setdefault("layout", {})
+    # Como no use_container_width do Streamlit: a largura é a da coluna
+    layout.pop("width", None)
+    layout["autosize"] = True
+    config = json.loads(proto.config) if proto.config else {}
+    config.update({"responsive": True, "displaylogo": False})
+    url = saida.gravar_versionado("figuras", f"figura{numero}", ".json", _json({"spec": spec, "config": config}))
+    altura = layout.get("height", 450)
+    return f'<div class="grafico" data-figura="{url}" style="height:{altura}px"></div>'
+
+
+def _hub(elemento, url_indice):
+    # Rótulos e textos de ajuda vêm dos widgets do fragmento na página
+    texto = next(e for e in _descendentes(elemento) if e.type == "text_input")
+    selecoes = [e for e in _descendentes(elemento) if e.type == "selectbox"]
+    opcoes_uf = "".join(f'<option value="{uf}">{uf}</option>' for uf in matriz_od.SIGLAS)
+    return f"""<div class="hub" id="hub" data-indice="{url_indice}">
+<div class="hub-filtros">
+<label class="hub-texto">{html.escape(texto.label)}<input type="search" id="hub-texto" placeholder="{html.escape(texto.placeholder)}" autocomplete="off"></label>
+<label class="hub-uf">{html.escape(selecoes[0].label)}<select id="hub-uf"><option value="">Todas</option>{opcoes_uf}</select></label>
+</div>
+<label>{html.escape(selecoes[1].label)}<select id="hub-municipio"><option value="">Escolha um município...</option></select></label>
+<div id="hub-resultado"><p class="aviso">Os dados serão exibidos aqui</p></div>
+</div>"""
+
+
+def _ao_vivo(url_app):
+    if url_app:
+        return f'<p class="aviso">Esta consulta é interativa: <a href="{html.escape(url_app)}">abra a versão ao vivo do especial</a>.</p>'
+    return '<p class="aviso">Esta consulta está disponível na versão ao vivo do especial.</p>'
+
+
+def corpo_html(elementos, fotos, saida, url_indice, url_app=None):
+    """Trechos de HTML dos elementos, na ordem da página, e o título dela."""
+    partes, titulo, lista = [], None, []
+    primeira_foto = True
+    graficos = 0
+
+    def fechar_lista():
+        if lista:
+            partes.append("<ul>" + "".join(f"<li>{item}</li>" for item in lista) + "</ul>")
+            lista.clear()
+
+    def visitar(elemento):
+        nonlocal titulo, graficos, primeira_foto
+        tipo = elemento.type
+        if tipo == "markdown" and elemento.value.startswith("- "):
+            lista.append(_markdown(elemento.value[2:]))
+            return
+        fechar_lista()
+        if tipo == "markdown":
+            if elemento.proto.allow_html:
+                partes.append(elemento.value)
+            else:
+                partes.append(f"<p>{_markdown(elemento.value)}</p>")
+        elif tipo in ("title", "header", "subheader"):
+            tag = elemento.proto.tag or "h2"
+            partes.append(f"<{tag}>{html.escape(elemento.value)}</{tag}>")
+            titulo = titulo or elemento.value
+        elif tipo == "caption":
+            partes.append(f'<p class="legenda">{_markdown(elemento.value)}</p>')
+        elif tipo == "image":
+            # A página anota de que arquivo veio cada foto (exibir_foto)
+            for legenda in elemento.captions:
+                partes.append(_foto(saida, fotos[legenda], legenda, primeira_foto))
+                primeira_foto = False
+        elif tipo == "plotly_chart":
+            graficos += 1
+            partes.append(_grafico(saida, elemento.proto, graficos))
+        elif tipo == "expander":
+            partes.append(f"<details><summary>{html.escape(elemento.label)}</summary>")
+            for filho in elemento.children.values():
+                visitar(filho)
+            fechar_lista()
+            partes.append("</details>")
+        elif tipo == "flex_container":
+            # Os blocos de primeiro nível são os fragmentos interativos
+            if any(e.type == "text_input" for e in _descendentes(elemento)):
+                partes.append(_hub(elemento, url_indice))
+            else:
+                partes.append(_ao_vivo(url_app))
+
+    for elemento in elementos:
+        visitar(elemento)
+    fechar_lista()
+    return partes, titulo
+
+
+# ---------------------------------------------------------------
+# DADOS DO HUB
+# ---------------------------------------------------------------
+# indice-<hash>.json: {"origens": [...], "nomes": [...], "populacao": [...],
+# "shards": {"UF": "municipios/UF-<hash>.json"}}. Cada shard mapeia o nome
+# do município para [total, migrantes, origem, população, origem, ...], com
+# as origens já da maior para a menor, como em IndiceMunicipios.consultar.
+
+def dados_hub(saida, indice):
+    base = indice.base
+    por_uf = {}
+    for i, nome in enumerate(base.municipios):
+        faixa = slice(indice.inicio[i], indice.fim[i])
+        pares = [int(v) for par in zip(base.origem[faixa], base.populacao[faixa]) for v in par]
+        uf = matriz_od.uf_do_municipio(nome) or "outros"
+        por_uf.setdefault(uf, {})[nome] = [int(indice.total[i]), int(indice.migrantes[i]), pares]
+
+    shards = {uf: saida.gravar_versionado("municipios", uf, ".json", _json(municipios))
+              for uf, municipios in sorted(por_uf.items())}
+    return saida.gravar_versionado("municipios", "indice", ".json", _json({
+        "origens": list(base.origens),
+        "nomes": list(base.municipios),
+        "populacao": indice.total.tolist(),
+        "shards": shards,
+    }))
+
+
+# ---------------------------------------------------------------
+# MODELO DA PÁGINA
+# ---------------------------------------------------------------
+
+ESTILO = """
+body{margin:0;font-family:"Source Sans Pro",-apple-system,"Segoe UI",Roboto,sans-serif;color:#31333f;line-height:1.6;font-size:1rem}
+main{max-width:%(largura)dpx;margin:0 auto;padding:3rem 1rem 6rem}
+h1{font-size:2.75rem;line-height:1.2;margin:0 0 1rem}
+h3{font-size:1.5rem;line-height:1.3;margin:2rem 0 1rem}
+figure{margin:1rem 0}
+figure img{width:100%%;height:auto;display:block}
+figcaption,.legenda{font-size:.875rem;color:rgba(49,51,63,.6)}
+details{border:1px solid rgba(49,51,63,.2);border-radius:.5rem;padding:.5rem 1rem;margin:1rem 0}
+summary{cursor:pointer}
+.grafico{width:100%%;margin:1rem 0}
+.aviso{background:rgba(28,131,225,.1);color:#004280;border-radius:.5rem;padding:1rem}
+.hub label{display:block;font-size:.875rem;margin:.5rem 0}
+.hub input,.hub select{display:block;width:100%%;box-sizing:border-box;font:inherit;padding:.4rem .6rem;margin-top:.25rem;border:1px solid #ccc;border-radius:.5rem;background:#f0f2f6}
+.hub-filtros{display:grid;grid-template-columns:3fr 1fr;gap:1rem}
+.hub table{width:100%%;border-collapse:collapse;font-size:.875rem}
+.hub th,.hub td{text-align:left;padding:.25rem .5rem;border-bottom:1px solid #e6e9ef}
+.hub td+td,.hub th+th{text-align:right}
+.hub-tabela{max-height:400px;overflow-y:auto}
+.hub-totais{display:grid;grid-template-columns:1fr 1fr;gap:1rem}
+.hub-totais span{display:block;font-size:.875rem}
+.hub-totais strong{font-size:2.25rem;font-weight:400}
+""" % {"largura": imagens.LARGURA_COLUNA}
+
+# A busca repete a de busca.py: prefixo do nome, prefixo de palavra e
+# trigramas, com empate desfeito pela população
+SCRIPT = r"""
+(function () {
+  "use strict";
+  var PLOTLY = document.documentElement.dataset.plotly;
+  var carregandoPlotly = null;
+  function plotly() {
+    carregandoPlotly = carregandoPlotly || new Promise(function (ok, erro) {
+      var s = document.createElement("script");
+      s.src = PLOTLY; s.onload = ok; s.onerror = erro;
+      document.head.appendChild(s);
+    });
+    return carregandoPlotly;
+  }
+  function desenhar(div) {
+    Promise.all([plotly(), fetch(div.dataset.figura).then(function (r) { return r.json(); })])
+      .then(function (r) { Plotly.newPlot(div, r[1].spec.data, r[1].spec.layout, r[1].config); });
+  }
+  var graficos = document.querySelectorAll(".grafico");
+  if ("IntersectionObserver" in window) {
+    var observador = new IntersectionObserver(function (entradas) {
+      entradas.forEach(function (e) {
+        if (e.isIntersecting) { observador.unobserve(e.target); desenhar(e.target); }
+      });
+    }, {rootMargin: "600px"});
+    graficos.forEach(function (g) { observador.observe(g); });
+  } else {
+    graficos.forEach(desenhar);
+  }
+
+  var hub = document.getElementById("hub");
+  if (!hub) return;
+  var texto = document.getElementById("hub-texto");
+  var ufs = document.getElementById("hub-uf");
+  var escolha = document.getElementById("hub-municipio");
+  var resultado = document.getElementById("hub-resultado");
+  var indice = null, chaves, trigramasNomes, ufNomes, shards = {};
+  var inteiro = new Intl.NumberFormat("pt-BR");
+  var percentual = new Intl.NumberFormat("pt-BR", {minimumFractionDigits: 2, maximumFractionDigits: 2});
+
+  function normalizar(t) {
+    return t.normalize("NFKD").replace(/[\u0300-\u036f]/g, "").toLowerCase().trim();
+  }
+  function chaveBusca(t) {
+    return normalizar(t.replace(/\s*\([A-Z]{2}\)\s*$/, "")).replace(/[^0-9a-z]+/g, " ").trim();
+  }
+  function trigramas(c) {
+    var t = "  " + c + " ", s = new Set();
+    for (var i = 0; i < t.length - 2; i++) s.add(t.slice(i, i + 3));
+    return s;
+  }
+  function ufDe(nome) {
+    var m = /\(([A-Z]{2})\)\s*$/.exec(nome);
+    return m ? m[1] : "";
+  }
+  function carregarIndice() {
+    return indice ? Promise.resolve(indice) : fetch(hub.dataset.indice).then(function (r) { return r.json(); }).then(function (d) {
+      chaves = d.nomes.map(chaveBusca);
+      ufNomes = d.nomes.map(ufDe);
+      indice = d;
+      return d;
+    });
+  }
+  function ordenar(candidatos, pontos) {
+    candidatos.sort(function (a, b) {
+      return (pontos[b] - pontos[a]) || (indice.populacao[b] - indice.populacao[a]);
+    });
+    return candidatos.slice(0, 20).map(function (i) { return indice.nomes[i]; });
+  }
+  function buscar(t, uf) {
+    var chave = chaveBusca(t);
+    if (!chave) return [];
+    var tri = chave.length >= 3 ? trigramas(chave) : null;
+    trigramasNomes = trigramasNomes || chaves.map(trigramas);
+    var pontos = {}, candidatos = [];
+    for (var i = 0; i < chaves.length; i++) {
+      if (uf && ufNomes[i] !== uf) continue;
+      var c = chaves[i], p = 0;
+      if (c.lastIndexOf(chave, 0) === 0) p = c === chave ? 5 : 3;
+      else if ((" " + c).indexOf(" " + chave) > 0) p = 2;
+      if (tri) {
+        var acertos = 0;
+        tri.forEach(function (g) { if (trigramasNomes[i].has(g)) acertos++; });
+        if (acertos / tri.size >= 0.5) p += acertos / tri.size;
+      }
+      if (p > 0) { pontos[i] = p; candidatos.push(i); }
+    }
+    return ordenar(candidatos, pontos);
+  }
+  function maiores(uf) {
+    var candidatos = [], pontos = {};
+    for (var i = 0; i < ufNomes.length; i++) if (ufNomes[i] === uf) { candidatos.push(i); pontos[i] = 0; }
+    return ordenar(candidatos, pontos);
+  }
+  function escapar(t) {
+    return t.replace(/[&<>"]/g, function (c) { return {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}[c]; });
+  }
+  function atualizarOpcoes() {
+    carregarIndice().then(function () {
+      var opcoes = texto.value ? buscar(texto.value, ufs.value) : ufs.value ? maiores(ufs.value) : [];
+      escolha.innerHTML = '<option value="">Escolha um município...</option>' + opcoes.map(function (n) {
+        return "<option>" + escapar(n) + "</option>";
+      }).join("");
+      if (texto.value && opcoes.length) escolha.value = opcoes[0];
+      mostrar();
+    });
+  }
+  function mostrar() {
+    var nome = escolha.value;
+    if (!nome) { resultado.innerHTML = '<p class="aviso">Os dados serão exibidos aqui</p>'; return; }
+    var uf = ufDe(nome) || "outros";
+    shards[uf] = shards[uf] || fetch(indice.shards[uf]).then(function (r) { return r.json(); });
+    shards[uf].then(function (dados) {
+      if (escolha.value !== nome) return;
+      var m = dados[nome], total = m[0], linhas = [];
+      for (var i = 0; i < m[2].length; i += 2) {
+        var pop = m[2][i + 1];
+        linhas.push("<tr><td>" + escapar(indice.origens[m[2][i]]) + "</td><td>" + inteiro.format(pop) +
+                    "</td><td>" + percentual.format(total ? pop * 100 / total : 0) + "%</td></tr>");
+      }
+      resultado.innerHTML = "<h3>População por Estado de Origem em " + escapar(nome) + "</h3>" +
+        '<div class="hub-tabela"><table><thead><tr><th>Origem</th><th>População</th><th>Percentual</th></tr></thead><tbody>' +
+        linhas.join("") + "</tbody></table></div><h3>Totais no município selecionado</h3>" +
+        '<div class="hub-totais"><div><span>Migrantes totais</span><strong>' + inteiro.format(m[1]) +
+        '</strong></div><div><span>População total do município</span><strong>' + inteiro.format(total) + "</strong></div></div>";
+    });
+  }
+  texto.addEventListener("input", atualizarOpcoes);
+  texto.addEventListener("focus", carregarIndice, {once: true});
+  ufs.addEventListener("change", atualizarOpcoes);
+  escolha.addEventListener("change", mostrar);
+})();
+"""
+
+PAGINA = """<!doctype html>
+<html lang="pt-BR" data-plotly="{plotly}">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{titulo}</title>
+<link rel="stylesheet" href="{estilo}">
+<script src="{script}" defer></script>
+</head>
+<body>
+<main>
+{corpo}
+</main>
+</body>
+</html>
+"""
+
+
+# ---------------------------------------------------------------
+# EXPORTAÇÃO
+# ---------------------------------------------------------------
+
+def exportar(destino, pasta=PASTA_DADOS, url_app=None):
+    """Gera o site estático em destino e devolve {arquivo: bytes}.
+
+    O site é montado numa pasta ao lado e só então troca de lugar com o
+    anterior, para um servidor apontado para destino nunca ver meia exportação.
+    """
+    destino = os.path.abspath(destino)
+    provisoria = f"{destino}.novo-{os.getpid()}"
+    shutil.rmtree(provisoria, ignore_errors=True)
+    saida = Saida(provisoria)
+
+    elementos, fotos = elementos_pagina(pasta)
+    grafo = artefatos.grafo_pagina(pasta)
+    url_indice = dados_hub(saida, grafo.obter("indice"))
+    partes, titulo = corpo_html(elementos, fotos, saida, url_indice, url_app)
+
+    saida.gravar("index.html", PAGINA.format(
+        plotly=saida.copiar_versionado("recursos", PLOTLY_JS),
+        titulo=html.escape(titulo or ""),
+        estilo=saida.gravar_versionado("recursos", "estilo", ".css", ESTILO),
+        script=saida.gravar_versionado("recursos", "pagina", ".js", SCRIPT),
+        corpo="\n".join(partes),
+    ))
+
+    antiga = f"{destino}.antiga-{os.getpid()}"
+    if os.path.exists(destino):
+        os.rename(destino, antiga)
+    os.rename(provisoria, destino)
+    shutil.rmtree(antiga, ignore_errors=True)
+    return saida.tamanhos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta o especial como site estático.")
+    parser.add_argument("--pasta", default=PASTA_DADOS, help="pasta com o script e os dados")
+    parser.add_argument("--saida", default=os.path.join(PASTA_DADOS, "estatico"))
+    parser.add_argument("--url-app", help="endereço da versão ao vivo, para os links de comparação e rankings")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    tamanhos = exportar(args.saida, args.pasta, args.url_app)
+
+    grupos = {}
+    for caminho, tamanho in tamanhos.items():
+        pasta = caminho.split("/")[0] if "/" in caminho else caminho
+        quantidade, total = grupos.get(pasta, (0, 0))
+        grupos[pasta] = (quantidade + 1, total + tamanho)
+    print(f"{'parte':<14}{'arquivos':>9}{'KB':>10}")
+    for pasta, (quantidade, total) in sorted(grupos.items()):
+        print(f"{pasta:<14}{quantidade:>9}{total / 1024:>10.1f}")
+    shards = [t for c, t in tamanhos.items() if c.startswith("municipios/") and not c.startswith("municipios/indice")]
+    print(f"\nshard médio {sum(shards) / len(shards) / 1024:.1f} KB, maior {max(shards) / 1024:.1f} KB")
+    print(f"site em {args.saida} ({time.perf_counter() - inicio:.1f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    # O AppTest avisa sobre o contexto de execução a cada chamada st.*
+    logging.disable(logging.WARNING)
+    sys.exit(main())
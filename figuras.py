@@ -0,0 +1,230 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+import formatacao
+
+# ---------------------------------------------------------------
+# GRÁFICOS DA PÁGINA E CACHE DE FIGURAS
+# ---------------------------------------------------------------
+# Os dados dos gráficos só mudam entre publicações, então cada figura é
+# construída uma vez por versão dos dados e guardada já serializada (JSON).
+# O cache em memória tem limite de bytes e descarta as figuras usadas há mais
+# tempo; opcionalmente o JSON também vai para o disco e sobrevive a reinícios.
+
+# Mude quando alterar o visual de algum gráfico, para invalidar o disco
+VERSAO_FIGURAS = 1
+
+GEOJSON_ESTADOS = "https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson"
+
+
+def figura_saldo(df_saldo):
+    fig = px.bar(
+        df_saldo,
+        x="saldo_migratorio",
+        y="estado_nome",
+        orientation="h",
+        color="saldo_migratorio",
+        color_continuous_scale=["red", "white", "green"],
+        title="Gráfico em colunas com o saldo migratório dos estados",
+        labels={"estado_nome": "Estado", "saldo_migratorio": "Saldo migratório"},
+        text="saldo_formatado"
+    )
+
+    fig.update_layout(
+        xaxis_title="Saldo migratório",
+        yaxis_title="",
+        yaxis=dict(showgrid=False, tickfont=dict(size=14)),
+        xaxis=dict(showgrid=True, zeroline=True),
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        font=dict(size=14),
+        margin=dict(l=80, r=40, t=60, b=40),
+        height=900,
+        bargap=0.25
+    )
+
+    fig.update_traces(
+        textposition="auto",
+        textfont=dict(size=12),
+        marker_line_color="black",
+        marker_line_width=0.8,
+        hovertemplate=(
+            "<b>%{y}</b><br>"
+            "Saldo migratório: %{text}<extra></extra>"
+        )
+    )
+    return fig
+
+
+def figura_mapa(df_saldo):
+    fig = px.choropleth(
+        df_saldo,
+        geojson=GEOJSON_ESTADOS,
+        locations="uf",
+        color="taxa_migra",
+        color_continuous_scale=["#c90000", "#ffffff", "#1E0FF0"],
+        featureidkey="properties.sigla",
+        projection="mercator",
+        title="Mapa com a taxa migratória de cada estado (arraste o mouse para verificar)",
+    )
+
+    fig.update_geos(fitbounds="locations", visible=False)
+
+    fig.update_traces(
+        hovertemplate=(
+            "<b>%{customdata[3]}</b><br>"
+            "Taxa migratória: %{customdata[0]}<br>"
+            "Imigrantes: %{customdata[1]}<br>"
+            "Emigrantes: %{customdata[2]}<br>"
+            "Saldo migratório: %{customdata[4]}<extra></extra>"
+        ),
+        customdata=df_saldo[[
+            "taxa_formatada",
+            "imigrantes_fmt",
+            "emigrantes_fmt",
+            "uf",
+            "saldo_fmt"
+        ]]
+    )
+
+    fig.update_layout(
+        margin={"r": 0, "t": 30, "l": 0, "b": 0}
+    )
+    return fig
+
+
+def figura_matriz(matriz, matriz_pct):
+    # Linhas: região de nascimento; colunas: região de residência
+    text_display = formatacao.rotulos_celulas(matriz_pct.values, matriz.values)
+
+    return go.Figure(data=go.Heatmap(
+        z=matriz.values,
+        x=matriz.columns,
+        y=matriz.index,
+        colorscale='rdpu',
+        text=text_display,
+        texttemplate="%{text}",
+        hovertemplate='<b>Nascimento:</b> %{y}<br><b>Residência:</b> %{x}<br><b>População:</b> %{z:,.0f}<extra></extra>',
+    ))
+
+
+def figura_imigrantes(df_long):
+    fig_imigr = px.line(
+        df_long,
+        x="Ano",
+        y="População",
+        color="País/Região",
+        markers=True,
+        title="Evolução do número de imigrantes por país (2010–2022)",
+        labels={"População": "Número de imigrantes", "Ano": "Ano"}
+    )
+
+    fig_imigr.update_layout(
+        xaxis=dict(tickmode="array", tickvals=["2010", "2022"]),
+        yaxis_title="Número de imigrantes",
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        font=dict(size=14),
+        height=600,
+        legend_title_text="País/Região"
+    )
+    return fig_imigr
+
+
+def chave_figura(nome, versao):
+    texto = f"{nome}|{versao!r}|{VERSAO_FIGURAS}"
+    return nome + "-" + hashlib.sha256(texto.encode("utf-8")).hexdigest()[:16]
+
+
+class CacheFiguras:
+    """Cache LRU de figuras serializadas, limitado pelo tamanho do JSON.
+
+    Junto com o JSON fica a figura reconstruída uma única vez a partir dele,
+    que é o que o st.plotly_chart recebe: entregar um Figure pronto custa
+    alguns milissegundos, enquanto montar o gráfico com o plotly.express (ou
+    validar um dict) custa dezenas.
+    """
+
+    def __init__(self, limite_bytes=16 * 1024 * 1024, pasta=None):
+        self.limite_bytes = limite_bytes
+        self.pasta = pasta
+        self.bytes = 0
+        self.acertos = 0
+        self.faltas = 0
+        self.leituras_disco = 0
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def __contains__(self, chave):
+        return chave in self._itens
+
+    def json(self, chave):
+        with self._trava:
+            return self._itens[chave][0]
+
+    def _caminho_disco(self, chave):
+        return os.path.join(self.pasta, chave + ".json")
+
+    def _ler_disco(self, chave):
+        if not self.pasta:
+            return None
+        try:
+            with open(self._caminho_disco(chave), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _gravar_disco(self, chave, texto):
+        if not self.pasta:
+            return
+        try:
+            os.makedirs(self.pasta, exist_ok=True)
+            destino = self._caminho_disco(chave)
+            with open(destino + ".tmp", "w", encoding="utf-8") as f:
+                f.write(texto)
+            os.replace(destino + ".tmp", destino)
+        except OSError:
+            pass
+
+    def _guardar(self, chave, texto, figura):
+        self._itens[chave] = (texto, figura)
+        self.bytes += len(texto)
+        while self.bytes > self.limite_bytes and len(self._itens) > 1:
+            _, (antigo, _) = self._itens.popitem(last=False)
+            self.bytes -= len(antigo)
+
+    def obter(self, nome, versao, construir):
+        chave = chave_figura(nome, versao)
+        with self._trava:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave][1]
+            self.faltas += 1
+
+        texto = self._ler_disco(chave)
+        if texto is not None:
+            self.leituras_disco += 1
+        else:
+            texto = pio.to_json(construir(), validate=False)
+            self._gravar_disco(chave, texto)
+        figura = pio.from_json(texto)
+
+        with self._trava:
+            if chave not in self._itens:
+                self._guardar(chave, texto, figura)
+            return self._itens[chave][1]
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self.bytes = 0
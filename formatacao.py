@@ -0,0 +1,137 @@
+import numpy as np
+
+# ---------------------------------------------------------------
+# FORMATAÇÃO NO PADRÃO BRASILEIRO
+# ---------------------------------------------------------------
+# Funções que recebem um array (ou Series, ou lista) e devolvem um array de
+# textos do mesmo formato. Nada de .apply ou laço por elemento: cada campo
+# (sinal, dígitos com ponto de milhar, vírgula decimal) é escrito coluna a
+# coluna numa matriz de bytes, alinhado à direita e completado com bytes nulos
+# à esquerda. Os campos são colados lado a lado, os nulos são removidos de uma
+# vez só (por máscara, sem passar por bytes.replace) e o resultado é quebrado
+# em um texto por linha.
+
+_TROCA = str.maketrans(",.", ".,")
+_POTENCIAS = 10 ** np.arange(1, 19, dtype=np.int64)
+_ZERO = ord("0")
+_FIM_DE_LINHA = ord("\n")
+
+
+def formatar_brasileiro(numero):
+    return f"{numero:,}".translate(_TROCA)
+
+
+def formatar_percentual(valor, casas=2):
+    return f"{valor:.{casas}f}%".translate(_TROCA)
+
+
+def formatar_percentual_curto(valor):
+    # Uma casa decimal, sem ",0" sobrando: 87%, 6,8%
+    return f"{valor:.1f}".removesuffix(".0").translate(_TROCA) + "%"
+
+
+def _quantidade_digitos(valores):
+    return 1 + np.searchsorted(_POTENCIAS, valores, side="right")
+
+
+def _campo_inteiro(valores, separador=None, sinal=None):
+    # valores: inteiros não negativos; sinal: máscara das linhas com "-"
+    n = len(valores)
+    digitos = len(str(int(valores.max(initial=0))))
+    passo = 4 if separador else 3
+    largura = digitos + (digitos - 1) // 3 * (passo - 3) + 1
+    saida = np.zeros((n, largura), dtype=np.uint8)
+
+    resto = valores.copy()
+    for k in range(digitos):
+        # Da direita para a esquerda: o dígito k vem depois de k // 3
+        # separadores e só é escrito (como o separador antes dele) enquanto
+        # ainda há dígitos à esquerda; o resto da linha fica nulo
+        coluna = largura - 1 - (k + (k // 3 if separador else 0))
+        if k:
+            presente = resto > 0
+            saida[:, coluna] = (_ZERO + resto % 10) * presente
+            if separador and k % 3 == 0:
+                saida[:, coluna + 1] = ord(separador) * presente
+        else:
+            saida[:, coluna] = _ZERO + resto % 10
+        resto //= 10
+
+    if sinal is not None and sinal.any():
+        linhas = np.flatnonzero(sinal)
+        quantidade = _quantidade_digitos(valores[linhas])
+        inicio = largura - quantidade - ((quantidade - 1) // 3 if separador else 0)
+        saida[linhas, inicio - 1] = ord("-")
+    return saida
+
+
+def _campo_digitos(valores, casas):
+    # Exatamente `casas` dígitos, com os zeros à esquerda
+    saida = np.empty((len(valores), casas), dtype=np.uint8)
+    resto = valores.copy()
+    for coluna in range(casas - 1, -1, -1):
+        saida[:, coluna] = _ZERO + resto % 10
+        resto //= 10
+    return saida
+
+
+def _campo_literal(texto, n):
+    codigo = np.frombuffer(texto.encode("ascii"), dtype=np.uint8)
+    return np.broadcast_to(codigo, (n, len(codigo)))
+
+
+def _campos_inteiro(valores):
+    valores = np.asarray(valores).astype(np.int64).ravel()
+    return [_campo_inteiro(np.abs(valores), ".", valores < 0)]
+
+
+def _campos_decimal(valores, casas):
+    # Valores ausentes aparecem como zero, como já fazia a matriz de migração
+    valores = np.nan_to_num(np.asarray(valores, dtype=np.float64)).ravel()
+    escala = 10 ** casas
+    escalados = np.abs(valores) * escala
+    inteiros = np.rint(escalados).astype(np.int64)
+    # Nos empates exatos (x,5) o resultado depende do valor binário exato, que
+    # o produto acima pode ter arredondado; esses poucos casos seguem o format
+    for i in np.flatnonzero(escalados - np.floor(escalados) == 0.5):
+        inteiros[i] = int(f"{abs(valores[i]):.{casas}f}".replace(".", ""))
+    campos = [_campo_inteiro(inteiros // escala, sinal=np.signbit(valores))]
+    if casas:
+        campos += [_campo_literal(",", len(valores)), _campo_digitos(inteiros % escala, casas)]
+    return campos
+
+
+def _juntar(campos, formato):
+    n = int(np.prod(formato))
+    if n == 0:
+        return np.empty(formato, dtype=object)
+    linhas = np.hstack(campos + [np.full((n, 1), _FIM_DE_LINHA, dtype=np.uint8)])
+    texto = linhas[linhas != 0].tobytes().decode("ascii")
+    return np.array(texto.split("\n")[:-1], dtype=object).reshape(formato)
+
+
+def formatar_inteiros(valores):
+    return _juntar(_campos_inteiro(valores), np.shape(valores))
+
+
+def formatar_percentuais(valores, casas=2):
+    formato = np.shape(valores)
+    campos = _campos_decimal(valores, casas)
+    return _juntar(campos + [_campo_literal("%", campos[0].shape[0])], formato)
+
+
+def rotulos_celulas(percentuais, populacoes, casas=1, vazio="—"):
+    # Rótulo "pct<br>pop" de cada célula de uma matriz; células sem população
+    # ficam com o traço
+    formato = np.shape(populacoes)
+    populacoes = np.nan_to_num(np.asarray(populacoes, dtype=np.float64)).astype(np.int64).ravel()
+    # Só as células com população são formatadas
+    com_populacao = np.flatnonzero(populacoes != 0)
+    campos = (
+        _campos_decimal(np.asarray(percentuais).ravel()[com_populacao], casas)
+        + [_campo_literal("%<br>", len(com_populacao))]
+        + _campos_inteiro(populacoes[com_populacao])
+    )
+    rotulos = np.full(populacoes.size, vazio, dtype=object)
+    rotulos[com_populacao] = _juntar(campos, len(com_populacao))
+    return rotulos.reshape(formato)
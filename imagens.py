@@ -0,0 +1,194 @@
+import io
+import json
+import os
+import sys
+import threading
+
+from PIL import Image, ImageOps
+
+import dados
+
+# ---------------------------------------------------------------
+# VARIANTES REDIMENSIONADAS DAS FOTOS DO ARTIGO
+# ---------------------------------------------------------------
+# As fotos iam para o navegador no tamanho original (o wisnel.png sozinho tem
+# 1,2 MB). Cada foto ganha versões em WebP em algumas larguras fixas, gravadas
+# em .cache/imagens com o hash do conteúdo no nome. Um manifesto guarda o
+# tamanho, o mtime e o hash de cada original, então só as fotos que mudaram
+# são reprocessadas, e as variantes da versão anterior delas são apagadas.
+# Na página, escolhe-se a menor variante que cobre a largura em que a foto
+# é exibida.
+
+LARGURAS = (480, 720, 1080, 1440)
+QUALIDADE = 80
+FORMATO = "WEBP"
+EXTENSAO = ".webp"
+
+# Mude ao alterar larguras, qualidade ou formato, para refazer as variantes
+VERSAO_VARIANTES = 1
+
+# Coluna central do layout padrão do Streamlit, em pixels CSS
+LARGURA_COLUNA = 704
+
+IMAGENS_ARTIGO = (
+    "agenciabrasilmarcelo.jpg",
+    "prefeiturasp.jpg",
+    "florianopolis.jpg",
+    "agenciasenado.jpg",
+    "wisnel.png",
+)
+
+_trava = threading.Lock()
+
+
+def _pasta(caminho):
+    return os.path.join(os.path.dirname(os.path.abspath(caminho)), dados.PASTA_CACHE, "imagens")
+
+
+def _caminho_manifesto(pasta):
+    return os.path.join(pasta, "manifesto.json")
+
+
+def _ler_manifesto(pasta):
+    try:
+        with open(_caminho_manifesto(pasta), encoding="utf-8") as f:
+            manifesto = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifesto.get("versao") != VERSAO_VARIANTES:
+        return {}
+    return manifesto.get("imagens", {})
+
+
+def _gravar_manifesto(pasta, imagens):
+    destino = _caminho_manifesto(pasta)
+    # Temporário por processo: a página e o exportar.py podem gravar juntos
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump({"versao": VERSAO_VARIANTES, "imagens": imagens}, f, ensure_ascii=False, indent=1)
+    os.replace(temporario, destino)
+
+
+def _larguras_para(largura_original):
+    larguras = [w for w in LARGURAS if w < largura_original]
+    # A maior variante nunca passa do original, que também entra como degrau
+    return larguras + [largura_original]
+
+
+def _codificar(imagem, largura):
+    if imagem.width != largura:
+        altura = round(imagem.height * largura / imagem.width)
+        imagem = imagem.resize((largura, altura), Image.LANCZOS)
+    saida = io.BytesIO()
+    imagem.save(saida, FORMATO, quality=QUALIDADE, method=6)
+    return saida.getvalue()
+
+
+def _gerar(caminho, pasta, sha256):
+    with Image.open(caminho) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ("RGB", "RGBA"):
+            original = original.convert("RGBA" if "A" in original.getbands() else "RGB")
+        variantes = {}
+        for largura in _larguras_para(original.width):
+            arquivo = f"{sha256[:16]}-{largura}{EXTENSAO}"
+            destino = os.path.join(pasta, arquivo)
+            if not os.path.exists(destino):
+                conteudo = _codificar(original, largura)
+                temporario = f"{destino}.{os.getpid()}.tmp"
+                with open(temporario, "wb") as f:
+                    f.write(conteudo)
+                os.replace(temporario, destino)
+            variantes[str(largura)] = arquivo
+    return variantes
+
+
+def _apagar_variantes(pasta, sha256, imagens):
+    # Variantes de uma versão antiga da foto, a menos que outra foto do
+    # manifesto tenha o mesmo conteúdo (e portanto os mesmos arquivos)
+    if any(info["sha256"] == sha256 for info in imagens.values()):
+        return
+    prefixo = f"{sha256[:16]}-"
+    for arquivo in os.listdir(pasta):
+        if arquivo.startswith(prefixo):
+            try:
+                os.remove(os.path.join(pasta, arquivo))
+            except FileNotFoundError:
+                pass
+
+
+def preparar(caminho):
+    """Garante as variantes de uma foto e devolve {largura: caminho}."""
+    pasta = _pasta(caminho)
+    nome = os.path.basename(caminho)
+    with _trava:
+        imagens = _ler_manifesto(pasta)
+        anterior = imagens.get(nome)
+        info = os.stat(caminho)
+
+        atual = anterior is not None and (anterior["tamanho"], anterior["mtime_ns"]) == (info.st_size, info.st_mtime_ns)
+        if not atual:
+            sha256 = dados.hash_arquivo(caminho)
+            if anterior is None or anterior["sha256"] != sha256:
+                os.makedirs(pasta, exist_ok=True)
+                variantes = _gerar(caminho, pasta, sha256)
+            else:
+                variantes = anterior["variantes"]
+            imagens[nome] = {
+                "tamanho": info.st_size,
+                "mtime_ns": info.st_mtime_ns,
+                "sha256": sha256,
+                "variantes": variantes,
+            }
+            _gravar_manifesto(pasta, imagens)
+            if anterior is not None and anterior["sha256"] != sha256:
+                _apagar_variantes(pasta, anterior["sha256"], imagens)
+        variantes = imagens[nome]["variantes"]
+
+    if not all(os.path.exists(os.path.join(pasta, v)) for v in variantes.values()):
+        # Alguém apagou arquivos do cache: refaz a partir do original
+        with _trava:
+            imagens = _ler_manifesto(pasta)
+            imagens.pop(nome, None)
+            _gravar_manifesto(pasta, imagens)
+        return preparar(caminho)
+    return {int(w): os.path.join(pasta, v) for w, v in variantes.items()}
+
+
+def variante(caminho, largura_exibida=LARGURA_COLUNA, densidade=1.5):
+    """Menor variante que cobre a largura exibida na densidade de tela pedida.
+
+    Se não der para gerar variantes (cache sem permissão de escrita, por
+    exemplo), devolve o próprio original.
+    """
+    try:
+        variantes = preparar(caminho)
+    except OSError:
+        return caminho
+    necessaria = largura_exibida * densidade
+    for largura in sorted(variantes):
+        if largura >= necessaria:
+            return variantes[largura]
+    return variantes[max(variantes)]
+
+
+def main():
+    pasta = sys.argv[1] if len(sys.argv) > 1 else os.path.dirname(os.path.abspath(__file__))
+    antes = depois = 0
+    print(f"{'imagem':<28}{'original (KB)':>15}{'exibida (KB)':>14}  variantes")
+    for nome in IMAGENS_ARTIGO:
+        caminho = os.path.join(pasta, nome)
+        variantes = preparar(caminho)
+        escolhida = variante(caminho)
+        tamanho_original = os.path.getsize(caminho)
+        tamanho_exibida = os.path.getsize(escolhida)
+        antes += tamanho_original
+        depois += tamanho_exibida
+        larguras = ", ".join(str(w) for w in sorted(variantes))
+        print(f"{nome:<28}{tamanho_original / 1024:>15.1f}{tamanho_exibida / 1024:>14.1f}  {larguras}")
+    print(f"\npeso das fotos na página: {antes / 1024:.1f} KB -> {depois / 1024:.1f} KB"
+          f" ({(1 - depois / antes) * 100:.0f}% menor)")
+
+
+if __name__ == "__main__":
+    main()
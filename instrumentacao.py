@@ -0,0 +1,328 @@
+import collections
+import contextlib
+import functools
+import json
+import os
+import statistics
+import threading
+import time
+import tracemalloc
+
+# ---------------------------------------------------------------
+# INSTRUMENTAÇÃO DA PÁGINA (TEMPOS, CACHES E MEMÓRIA)
+# ---------------------------------------------------------------
+# Ligada só com MIGRACAO_INSTRUMENTACAO=1. Desligada, cada ponto de medida
+# devolve na hora (ou nem é instalado, no caso dos decoradores), então não
+# custa nada em produção.
+#
+# Uma "execução" é um rerun do script inteiro ou só de um fragmento. O
+# Streamlit roda cada rerun numa thread nova, então o estado da execução
+# corrente fica num threading.local. Dentro dela:
+#   - secao(nome) marca o começo de uma seção do script; a anterior termina;
+#   - trecho(nome) mede um bloco (cargas de dados, montagem de figuras);
+#   - cache(nome, decorador) conta chamadas e faltas de um st.cache_*;
+#   - a cada MIGRACAO_INSTRUMENTACAO_MEMORIA execuções, uma é amostrada com
+#     tracemalloc (o pico é do processo inteiro durante a execução).
+# Cada execução terminada vira uma linha JSON em execucoes.jsonl e atualiza
+# metricas.prom (formato texto do Prometheus), ambos em
+# MIGRACAO_INSTRUMENTACAO_PASTA (padrão .cache/instrumentacao).
+
+ATIVA = os.environ.get("MIGRACAO_INSTRUMENTACAO", "") not in ("", "0")
+PASTA = os.environ.get("MIGRACAO_INSTRUMENTACAO_PASTA", os.path.join(".cache", "instrumentacao"))
+EXECUCOES_RECENTES = int(os.environ.get("MIGRACAO_INSTRUMENTACAO_EXECUCOES", "20"))
+AMOSTRAGEM_MEMORIA = int(os.environ.get("MIGRACAO_INSTRUMENTACAO_MEMORIA", "10"))
+
+PREFIXO_METRICAS = "migracao"
+
+_NADA = contextlib.nullcontext()
+
+_local = threading.local()
+_trava = threading.Lock()
+
+_recentes = collections.deque(maxlen=EXECUCOES_RECENTES)
+_execucoes = collections.Counter()
+_trechos_soma = collections.Counter()
+_trechos_contagem = collections.Counter()
+_cache_chamadas = collections.Counter()
+_cache_faltas = collections.Counter()
+_observados = {}
+# Execuções amostradas ainda abertas: id -> thread que as começou
+_amostradas = {}
+_numero_execucao = 0
+_rastreando = 0
+_ultimo_pico = None
+
+
+def _agora_ms():
+    return time.perf_counter() * 1000
+
+
+def _execucao():
+    return getattr(_local, "execucao", None)
+
+
+# ---------------------------------------------------------------
+# EXECUÇÕES
+# ---------------------------------------------------------------
+
+def _soltar_memoria(execucao):
+    # Chamada com _trava; o último a soltar desliga o tracemalloc
+    global _rastreando
+    if _amostradas.pop(id(execucao), None) is None:
+        return
+    _rastreando -= 1
+    if _rastreando == 0:
+        tracemalloc.stop()
+
+
+def _descartar_interrompidas():
+    # Um rerun interrompido (RerunException, StopException ou erro no script)
+    # não chega ao finalizar_execucao(). A execução que sobrou nesta thread é
+    # descartada, e as amostradas de threads que já terminaram soltam o
+    # tracemalloc, senão ele ficaria ligado para sempre.
+    sobra = _execucao()
+    _local.execucao = None
+    with _trava:
+        if sobra is not None:
+            _soltar_memoria(sobra)
+        for execucao, thread in list(_amostradas.values()):
+            if not thread.is_alive():
+                _soltar_memoria(execucao)
+
+
+def iniciar_execucao(tipo="pagina"):
+    global _numero_execucao, _rastreando
+    if not ATIVA:
+        return
+    _descartar_interrompidas()
+    with _trava:
+        _numero_execucao += 1
+        amostrar = AMOSTRAGEM_MEMORIA > 0 and _numero_execucao % AMOSTRAGEM_MEMORIA == 1 % AMOSTRAGEM_MEMORIA
+        if amostrar:
+            if _rastreando == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            _rastreando += 1
+            tracemalloc.reset_peak()
+        execucao = {
+            "tipo": tipo,
+            "inicio": time.time(),
+            "t0": _agora_ms(),
+            "trechos": [],
+            "secao": None,
+            "memoria": amostrar,
+        }
+        if amostrar:
+            _amostradas[id(execucao)] = (execucao, threading.current_thread())
+    _local.execucao = execucao
+
+
+def _fechar_secao(execucao):
+    if execucao["secao"] is not None:
+        nome, inicio = execucao["secao"]
+        execucao["trechos"].append(("secao:" + nome, _agora_ms() - inicio))
+        execucao["secao"] = None
+
+
+def finalizar_execucao():
+    global _ultimo_pico
+    execucao = _execucao()
+    if execucao is None:
+        return
+    _local.execucao = None
+    _fechar_secao(execucao)
+
+    registro = {
+        "inicio": execucao["inicio"],
+        "tipo": execucao["tipo"],
+        "duracao_ms": round(_agora_ms() - execucao["t0"], 3),
+        "trechos": [{"nome": n, "ms": round(ms, 3)} for n, ms in execucao["trechos"]],
+    }
+    with _trava:
+        if execucao["memoria"] and id(execucao) in _amostradas:
+            registro["pico_memoria_bytes"] = tracemalloc.get_traced_memory()[1]
+            _ultimo_pico = registro["pico_memoria_bytes"]
+            _soltar_memoria(execucao)
+        _recentes.append(registro)
+        _execucoes[execucao["tipo"]] += 1
+        for nome, ms in execucao["trechos"]:
+            _trechos_soma[nome] += ms / 1000
+            _trechos_contagem[nome] += 1
+        try:
+            _exportar(registro)
+        except OSError:
+            # Sem onde gravar (pasta somente leitura): o painel ainda funciona
+            pass
+
+
+def secao(nome):
+    """Começa a seção nome do script; a seção anterior termina aqui."""
+    if not ATIVA:
+        return
+    execucao = _execucao()
+    if execucao is None:
+        return
+    _fechar_secao(execucao)
+    execucao["secao"] = (nome, _agora_ms())
+
+
+class _Trecho:
+    __slots__ = ("nome", "inicio")
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = _agora_ms()
+
+    def __exit__(self, *erro):
+        execucao = _execucao()
+        if execucao is not None:
+            execucao["trechos"].append((self.nome, _agora_ms() - self.inicio))
+
+
+def trecho(nome):
+    """Mede um bloco dentro da execução corrente (with trecho("saldo"): ...)."""
+    if not ATIVA:
+        return _NADA
+    return _Trecho(nome)
+
+
+def fragmento(nome):
+    """Decorador para o corpo de um st.fragment.
+
+    Quando o fragmento roda junto com a página, vira um trecho da execução
+    dela; quando roda sozinho (interação dentro do fragmento), é uma
+    execução própria do tipo "fragmento:<nome>".
+    """
+    def aplicar(funcao):
+        if not ATIVA:
+            return funcao
+
+        @functools.wraps(funcao)
+        def medir(*args, **kwargs):
+            if _execucao() is not None:
+                with _Trecho("fragmento:" + nome):
+                    return funcao(*args, **kwargs)
+            iniciar_execucao("fragmento:" + nome)
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                finalizar_execucao()
+        return medir
+    return aplicar
+
+
+def cache(nome, decorador):
+    """Aplica um st.cache_data/st.cache_resource contando chamadas e faltas.
+
+    O corpo da função só roda quando o cache falha, então as faltas são
+    contadas lá dentro; as chamadas, por fora. Desligada, devolve o próprio
+    decorador.
+    """
+    if not ATIVA:
+        return decorador
+
+    def aplicar(funcao):
+        @functools.wraps(funcao)
+        def na_falta(*args, **kwargs):
+            with _trava:
+                _cache_faltas[nome] += 1
+            return funcao(*args, **kwargs)
+
+        em_cache = decorador(na_falta)
+
+        @functools.wraps(funcao)
+        def chamar(*args, **kwargs):
+            with _trava:
+                _cache_chamadas[nome] += 1
+            with _Trecho("cache:" + nome):
+                return em_cache(*args, **kwargs)
+
+        chamar.clear = em_cache.clear
+        return chamar
+    return aplicar
+
+
+def observar(nome, objeto):
+    """Exporta os contadores acertos/faltas de um cache próprio (ex.: CacheFiguras)."""
+    if ATIVA:
+        with _trava:
+            _observados[nome] = objeto
+
+
+# ---------------------------------------------------------------
+# EXPORTAÇÃO E RESUMO
+# ---------------------------------------------------------------
+
+def _rotulo(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def metricas_prometheus():
+    p = PREFIXO_METRICAS
+    linhas = [
+        f"# HELP {p}_execucoes_total Reruns terminados, por tipo.",
+        f"# TYPE {p}_execucoes_total counter",
+    ]
+    linhas += [f'{p}_execucoes_total{{tipo="{_rotulo(t)}"}} {n}' for t, n in sorted(_execucoes.items())]
+
+    linhas += [
+        f"# HELP {p}_trecho_segundos Tempo gasto em cada seção, trecho e cache.",
+        f"# TYPE {p}_trecho_segundos summary",
+    ]
+    for nome in sorted(_trechos_contagem):
+        linhas.append(f'{p}_trecho_segundos_sum{{trecho="{_rotulo(nome)}"}} {_trechos_soma[nome]:.6f}')
+        linhas.append(f'{p}_trecho_segundos_count{{trecho="{_rotulo(nome)}"}} {_trechos_contagem[nome]}')
+
+    chamadas = dict(_cache_chamadas)
+    faltas = dict(_cache_faltas)
+    for nome, objeto in _observados.items():
+        chamadas[nome] = objeto.acertos + objeto.faltas
+        faltas[nome] = objeto.faltas
+    linhas += [
+        f"# HELP {p}_cache_acertos_total Chamadas atendidas pelo cache.",
+        f"# TYPE {p}_cache_acertos_total counter",
+    ]
+    linhas += [f'{p}_cache_acertos_total{{cache="{_rotulo(n)}"}} {chamadas[n] - faltas.get(n, 0)}' for n in sorted(chamadas)]
+    linhas += [
+        f"# HELP {p}_cache_faltas_total Chamadas que tiveram de calcular o valor.",
+        f"# TYPE {p}_cache_faltas_total counter",
+    ]
+    linhas += [f'{p}_cache_faltas_total{{cache="{_rotulo(n)}"}} {faltas.get(n, 0)}' for n in sorted(chamadas)]
+
+    if _ultimo_pico is not None:
+        linhas += [
+            f"# HELP {p}_memoria_pico_bytes Pico do tracemalloc na última execução amostrada.",
+            f"# TYPE {p}_memoria_pico_bytes gauge",
+            f"{p}_memoria_pico_bytes {_ultimo_pico}",
+        ]
+    return "\n".join(linhas) + "\n"
+
+
+def _exportar(registro):
+    os.makedirs(PASTA, exist_ok=True)
+    with open(os.path.join(PASTA, "execucoes.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    destino = os.path.join(PASTA, "metricas.prom")
+    with open(destino + ".tmp", "w", encoding="utf-8") as f:
+        f.write(metricas_prometheus())
+    os.replace(destino + ".tmp", destino)
+
+
+def execucoes_recentes():
+    with _trava:
+        return list(_recentes)
+
+
+def trechos_mais_lentos(limite=15):
+    """Trechos das últimas execuções, do pior tempo para o melhor."""
+    tempos = collections.defaultdict(list)
+    for registro in execucoes_recentes():
+        for t in registro["trechos"]:
+            tempos[t["nome"]].append(t["ms"])
+    resumo = [
+        {"Trecho": nome, "Execuções": len(ms), "Mediana (ms)": statistics.median(ms), "Máximo (ms)": max(ms)}
+        for nome, ms in tempos.items()
+    ]
+    resumo.sort(key=lambda linha: linha["Máximo (ms)"], reverse=True)
+    return resumo[:limite]
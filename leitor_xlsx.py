@@ -0,0 +1,158 @@
+import zipfile
+from array import array
+from xml.parsers import expat
+
+import numpy as np
+
+# ---------------------------------------------------------------
+# LEITOR INCREMENTAL DA PLANILHA DE MUNICÍPIOS
+# ---------------------------------------------------------------
+# O pd.read_excel monta o grafo de objetos do openpyxl para as 334 mil células
+# de texto antes de entregar o DataFrame. Aqui o sheet1.xml é lido em blocos
+# direto do zip por um parser expat (sem montar árvore nenhuma), as strings
+# compartilhadas são resolvidas uma única vez e as três colunas (Município,
+# Origem, População) vão direto para arrays tipados.
+
+TAMANHO_BLOCO = 1 << 16
+
+COLUNAS = ("Município", "Origem", "População")
+
+
+def _alimentar(parser, arquivo):
+    for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO), b""):
+        parser.Parse(bloco, False)
+    parser.Parse(b"", True)
+
+
+def ler_strings_compartilhadas(zf):
+    try:
+        arquivo = zf.open("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+
+    strings = []
+    partes = []
+    # Só o texto de <t> conta; <rPh> traz a leitura fonética, que fica de fora
+    estado = {"t": False, "rph": 0}
+
+    def inicio(nome, attrs):
+        if nome == "si":
+            partes.clear()
+        elif nome == "t" and not estado["rph"]:
+            estado["t"] = True
+        elif nome == "rPh":
+            estado["rph"] += 1
+
+    def fim(nome):
+        if nome == "si":
+            strings.append("".join(partes))
+        elif nome == "t":
+            estado["t"] = False
+        elif nome == "rPh":
+            estado["rph"] -= 1
+
+    def texto(dados):
+        if estado["t"]:
+            partes.append(dados)
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = inicio
+    parser.EndElementHandler = fim
+    parser.CharacterDataHandler = texto
+    with arquivo:
+        _alimentar(parser, arquivo)
+    return strings
+
+
+def _caminho_planilha(zf):
+    nomes = sorted(n for n in zf.namelist() if n.startswith("xl/worksheets/sheet"))
+    if "xl/worksheets/sheet1.xml" in nomes:
+        return "xl/worksheets/sheet1.xml"
+    return nomes[0]
+
+
+def _populacao(valor):
+    # Na planilha do IBGE, "-" significa zero
+    if valor is None or valor == "-" or valor == "":
+        return 0
+    try:
+        return int(valor)
+    except ValueError:
+        return int(float(valor))
+
+
+def ler_municipios_xlsx(caminho):
+    with zipfile.ZipFile(caminho) as zf:
+        strings = ler_strings_compartilhadas(zf)
+
+        municipio_cod = array("i")
+        origem_cod = array("i")
+        populacao = array("q")
+        codigos_municipio = {}
+        codigos_origem = {}
+
+        linha = {}
+        celula = {"coluna": None, "tipo": None, "partes": [], "lendo": False}
+        letras = []
+
+        def inicio(nome, attrs):
+            if nome == "c":
+                celula["coluna"] = attrs.get("r", "").rstrip("0123456789")
+                celula["tipo"] = attrs.get("t")
+                celula["partes"].clear()
+            elif nome == "v" or nome == "t":
+                celula["lendo"] = True
+            elif nome == "row":
+                linha.clear()
+
+        def texto(dados):
+            if celula["lendo"]:
+                celula["partes"].append(dados)
+
+        def fim(nome):
+            if nome == "v" or nome == "t":
+                celula["lendo"] = False
+            elif nome == "c":
+                if not celula["partes"]:
+                    return
+                valor = "".join(celula["partes"])
+                if celula["tipo"] == "s":
+                    valor = strings[int(valor)]
+                linha[celula["coluna"]] = valor
+            elif nome == "row":
+                fim_da_linha()
+
+        def fim_da_linha():
+            if not letras:
+                # Primeira linha: cabeçalho, com espaços sobrando nos nomes
+                cabecalho = {str(v).strip(): k for k, v in linha.items()}
+                letras.extend(cabecalho[nome] for nome in COLUNAS)
+                return
+            municipio = linha.get(letras[0])
+            if municipio is None:
+                return
+            origem = linha.get(letras[1])
+
+            municipio_cod.append(codigos_municipio.setdefault(municipio, len(codigos_municipio)))
+            if origem is None:
+                origem_cod.append(-1)
+            else:
+                origem_cod.append(codigos_origem.setdefault(origem, len(codigos_origem)))
+            populacao.append(_populacao(linha.get(letras[2])))
+
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.StartElementHandler = inicio
+        parser.EndElementHandler = fim
+        parser.CharacterDataHandler = texto
+        with zf.open(_caminho_planilha(zf)) as planilha:
+            _alimentar(parser, planilha)
+
+    return {
+        "municipio": np.frombuffer(municipio_cod, dtype=np.int32),
+        "origem": np.frombuffer(origem_cod, dtype=np.int32),
+        "populacao": np.frombuffer(populacao, dtype=np.int64),
+        "municipios": list(codigos_municipio),
+        "origens": list(codigos_origem),
+    }
@@ -0,0 +1,168 @@
+import re
+import unicodedata
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------------------------------
+# MATRIZES ORIGEM-DESTINO A PARTIR DA BASE MUNICIPAL
+# ---------------------------------------------------------------
+# Em vez de manter à mão uma matriz 5x5 de regiões, as matrizes são somadas
+# direto dos códigos inteiros da BaseMunicipios. Cada linha da base ganha um
+# código de grupo de residência e um de origem, e um único np.bincount sobre
+# o par (residência, origem) produz a matriz em qualquer nível de agregação.
+
+REGIOES = ("Norte", "Nordeste", "Sudeste", "Sul", "Centro-Oeste")
+
+UFS = {
+    "RO": ("Rondônia", "Norte"),
+    "AC": ("Acre", "Norte"),
+    "AM": ("Amazonas", "Norte"),
+    "RR": ("Roraima", "Norte"),
+    "PA": ("Pará", "Norte"),
+    "AP": ("Amapá", "Norte"),
+    "TO": ("Tocantins", "Norte"),
+    "MA": ("Maranhão", "Nordeste"),
+    "PI": ("Piauí", "Nordeste"),
+    "CE": ("Ceará", "Nordeste"),
+    "RN": ("Rio Grande do Norte", "Nordeste"),
+    "PB": ("Paraíba", "Nordeste"),
+    "PE": ("Pernambuco", "Nordeste"),
+    "AL": ("Alagoas", "Nordeste"),
+    "SE": ("Sergipe", "Nordeste"),
+    "BA": ("Bahia", "Nordeste"),
+    "MG": ("Minas Gerais", "Sudeste"),
+    "ES": ("Espírito Santo", "Sudeste"),
+    "RJ": ("Rio de Janeiro", "Sudeste"),
+    "SP": ("São Paulo", "Sudeste"),
+    "PR": ("Paraná", "Sul"),
+    "SC": ("Santa Catarina", "Sul"),
+    "RS": ("Rio Grande do Sul", "Sul"),
+    "MS": ("Mato Grosso do Sul", "Centro-Oeste"),
+    "MT": ("Mato Grosso", "Centro-Oeste"),
+    "GO": ("Goiás", "Centro-Oeste"),
+    "DF": ("Distrito Federal", "Centro-Oeste"),
+}
+SIGLAS = tuple(UFS)
+
+CAPITAIS = (
+    "Porto Velho (RO)", "Rio Branco (AC)", "Manaus (AM)", "Boa Vista (RR)",
+    "Belém (PA)", "Macapá (AP)", "Palmas (TO)", "São Luís (MA)", "Teresina (PI)",
+    "Fortaleza (CE)", "Natal (RN)", "João Pessoa (PB)", "Recife (PE)",
+    "Maceió (AL)", "Aracaju (SE)", "Salvador (BA)", "Belo Horizonte (MG)",
+    "Vitória (ES)", "Rio de Janeiro (RJ)", "São Paulo (SP)", "Curitiba (PR)",
+    "Florianópolis (SC)", "Porto Alegre (RS)", "Campo Grande (MS)",
+    "Cuiabá (MT)", "Goiânia (GO)", "Brasília (DF)",
+)
+
+NIVEIS_RESIDENCIA = ("regiao", "uf", "municipio")
+NIVEIS_ORIGEM = ("regiao", "uf")
+
+
+def normalizar(texto):
+    # Sem acento e sem caixa: a planilha traz "Goias" e "Espirito Santo"
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold().strip()
+
+
+_UF_POR_NOME = {normalizar(nome): i for i, (nome, _) in enumerate(UFS.values())}
+_REGIAO_DA_UF = np.array([REGIOES.index(regiao) for _, regiao in UFS.values()])
+_SIGLA_MUNICIPIO = re.compile(r"\(([A-Z]{2})\)\s*$")
+
+
+def uf_do_municipio(nome):
+    encontrado = _SIGLA_MUNICIPIO.search(nome)
+    return encontrado.group(1) if encontrado else None
+
+
+# Códigos de UF (posição em SIGLAS, -1 se não houver) de cada município e de
+# cada origem da base, calculados uma vez por base
+_mapas = weakref.WeakKeyDictionary()
+
+
+def mapas_uf(base):
+    if base not in _mapas:
+        uf_municipio = np.array([SIGLAS.index(uf) if uf in UFS else -1
+                                 for uf in map(uf_do_municipio, base.municipios)])
+        uf_origem = np.array([_UF_POR_NOME.get(normalizar(o), -1) for o in base.origens])
+        _mapas[base] = (uf_municipio, uf_origem)
+    return _mapas[base]
+
+
+def _grupos(codigos_uf, nivel, municipio=None):
+    if nivel == "municipio":
+        return municipio
+    if nivel == "uf":
+        return codigos_uf
+    return np.where(codigos_uf >= 0, _REGIAO_DA_UF[codigos_uf], -1)
+
+
+def _rotulos(base, nivel):
+    if nivel == "municipio":
+        return list(base.municipios)
+    if nivel == "uf":
+        return list(SIGLAS)
+    return list(REGIOES)
+
+
+def _dividir(valores, totais):
+    return np.divide(valores * 100.0, totais, out=np.zeros(valores.shape), where=totais > 0)
+
+
+def calcular_matriz_od(base, residencia="regiao", origem="regiao", diagonal=True):
+    """Matriz residência x origem (nascimento) somada sobre a base municipal.
+
+    Devolve um dicionário de DataFrames com índice = residência e colunas =
+    origem: "populacao", "pct_residentes" (parcela de todos os moradores do
+    destino, inclusive estrangeiros e sem declaração), "pct_linha" (parcela
+    dentro da linha da matriz) e "pct_coluna" (parcela dentro da coluna: para
+    onde foram os nascidos em cada origem). Com diagonal=False as células em
+    que residência e origem coincidem, ou em que a origem contém a residência
+    (a UF de um município, a região de uma UF), são zeradas, ficando só os
+    migrantes.
+    """
+    if residencia not in NIVEIS_RESIDENCIA:
+        raise ValueError(f"nível de residência inválido: {residencia}")
+    if origem not in NIVEIS_ORIGEM:
+        raise ValueError(f"nível de origem inválido: {origem}")
+
+    uf_municipio, uf_origem = mapas_uf(base)
+    codigo_municipio = np.asarray(base.municipio, dtype=np.int64)
+    linha = _grupos(uf_municipio, residencia, np.arange(len(base.municipios)))[codigo_municipio]
+    coluna = _grupos(uf_origem, origem)[base.origem]
+
+    n_linhas = len(_rotulos(base, residencia))
+    n_colunas = len(_rotulos(base, origem))
+    populacao = base.populacao
+
+    residentes = np.bincount(linha[linha >= 0], weights=populacao[linha >= 0], minlength=n_linhas)
+
+    validas = (linha >= 0) & (coluna >= 0)
+    plano = linha[validas] * n_colunas + coluna[validas]
+    matriz = np.bincount(plano, weights=populacao[validas], minlength=n_linhas * n_colunas)
+    matriz = matriz.reshape(n_linhas, n_colunas).astype(np.int64)
+
+    if not diagonal:
+        if residencia == origem:
+            np.fill_diagonal(matriz, 0)
+        else:
+            # Residência mais fina que a origem: zera a origem que a contém
+            # (a UF do município, a região da UF ou do município)
+            ufs = uf_municipio if residencia == "municipio" else np.arange(len(SIGLAS))
+            local = _grupos(ufs, origem)
+            possui = local >= 0
+            matriz[np.flatnonzero(possui), local[possui]] = 0
+
+    indice = pd.Index(_rotulos(base, residencia), name="residencia")
+    colunas = pd.Index(_rotulos(base, origem), name="origem")
+
+    def quadro(valores):
+        return pd.DataFrame(valores, index=indice, columns=colunas)
+
+    return {
+        "populacao": quadro(matriz),
+        "pct_residentes": quadro(_dividir(matriz, residentes[:, None])),
+        "pct_linha": quadro(_dividir(matriz, matriz.sum(axis=1, keepdims=True))),
+        "pct_coluna": quadro(_dividir(matriz, matriz.sum(axis=0, keepdims=True))),
+    }
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+from matriz_od import SIGLAS, mapas_uf
+
+# ---------------------------------------------------------------
+# RANKINGS NACIONAIS DE MUNICÍPIOS
+# ---------------------------------------------------------------
+# Todas as métricas são calculadas de uma vez para os ~5.570 municípios a
+# partir do IndiceMunicipios, e cada ranking fica guardado como uma ordem já
+# pronta (argsort decrescente). Uma consulta é só o fatiamento de uma página
+# dessa ordem, sem filtrar nem ordenar nada na hora. Para as métricas de
+# percentual, que ficariam dominadas por municípios minúsculos, há ordens
+# separadas para algumas faixas mínimas de população.
+
+METRICAS = {
+    "populacao": "População total",
+    "migrantes": "Migrantes",
+    "pct_migrantes": "Percentual de migrantes",
+    "nascidos_fora": "Nascidos fora da UF",
+    "pct_nascidos_fora": "Percentual de nascidos fora da UF",
+}
+
+POPULACOES_MINIMAS = (0, 10_000, 100_000)
+
+
+def _ordem_decrescente(valores, elegiveis=None):
+    ordem = np.argsort(-valores, kind="stable")
+    if elegiveis is not None:
+        ordem = ordem[elegiveis[ordem]]
+    ordem.setflags(write=False)
+    return ordem
+
+
+def _percentual(valores, totais):
+    return np.divide(valores * 100.0, totais, out=np.zeros(len(valores)), where=totais > 0)
+
+
+class Rankings:
+
+    def __init__(self, indice):
+        base = indice.base
+        self.nomes = np.asarray(base.municipios, dtype=object)
+        self.origens = tuple(base.origens)
+
+        uf_municipio, uf_origem = mapas_uf(base)
+        self.ufs = np.where(uf_municipio >= 0, np.asarray(SIGLAS)[uf_municipio], "")
+
+        # Origem "local" de cada município: a da própria UF (-1 se não houver)
+        origem_da_uf = np.full(len(SIGLAS), -1)
+        com_uf = np.flatnonzero(uf_origem >= 0)
+        origem_da_uf[uf_origem[com_uf]] = com_uf
+        local = np.where(uf_municipio >= 0, origem_da_uf[uf_municipio], -1)
+
+        total = indice.total
+        linhas = np.arange(len(total))
+        nascidos_local = np.where(local >= 0, indice.matriz[linhas, np.maximum(local, 0)], 0)
+
+        self.valores = {
+            "populacao": total,
+            "migrantes": indice.migrantes,
+            "pct_migrantes": _percentual(indice.migrantes, total),
+            "nascidos_fora": total - nascidos_local,
+            "pct_nascidos_fora": _percentual(total - nascidos_local, total),
+        }
+
+        self._ordens = {
+            (metrica, minima): _ordem_decrescente(valores, total >= minima)
+            for metrica, valores in self.valores.items()
+            for minima in POPULACOES_MINIMAS
+        }
+
+        # Destinos de quem nasceu em cada origem: uma coluna ordenada por
+        # origem, em número absoluto e em parcela da população do destino
+        self.matriz = indice.matriz
+        self.parcela = np.divide(
+            indice.matriz * 100.0, total[:, None],
+            out=np.zeros(indice.matriz.shape), where=total[:, None] > 0,
+        )
+        self._destinos = np.argsort(-self.matriz, axis=0, kind="stable").T.copy()
+        self._destinos_parcela = {
+            minima: [_ordem_decrescente(self.parcela[:, o], total >= minima)
+                     for o in range(len(self.origens))]
+            for minima in POPULACOES_MINIMAS
+        }
+
+        # Municípios em que a maior origem não é a da própria UF
+        self.maior_origem = indice.maior_origem
+        self.parcela_maior = _percentual(indice.maior, total)
+        dominados = (local >= 0) & (self.maior_origem != local) & (total > 0)
+        self._dominados = _ordem_decrescente(self.parcela_maior, dominados)
+
+    def _pagina(self, ordem, pagina, por_pagina, colunas):
+        inicio = pagina * por_pagina
+        codigos = ordem[inicio:inicio + por_pagina]
+        quadro = pd.DataFrame({
+            "Posição": np.arange(inicio + 1, inicio + len(codigos) + 1),
+            "Município": self.nomes[codigos],
+        })
+        for nome, valores in colunas.items():
+            quadro[nome] = valores[codigos]
+        return quadro
+
+    def _minima(self, populacao_minima):
+        if populacao_minima not in POPULACOES_MINIMAS:
+            raise ValueError(f"população mínima deve ser uma de {POPULACOES_MINIMAS}")
+        return populacao_minima
+
+    def quantidade(self, metrica, populacao_minima=0):
+        return len(self._ordens[metrica, self._minima(populacao_minima)])
+
+    def ranking(self, metrica, pagina=0, por_pagina=50, populacao_minima=0):
+        ordem = self._ordens[metrica, self._minima(populacao_minima)]
+        colunas = {"População total": self.valores["populacao"]}
+        if metrica != "populacao":
+            colunas[METRICAS[metrica]] = self.valores[metrica]
+        return self._pagina(ordem, pagina, por_pagina, colunas)
+
+    def destinos(self, origem, pagina=0, por_pagina=50, relativo=False, populacao_minima=0):
+        """Municípios com mais moradores nascidos na origem (nome, ex.: "Maranhão")."""
+        o = self.origens.index(origem)
+        if relativo:
+            ordem = self._destinos_parcela[self._minima(populacao_minima)][o]
+        else:
+            ordem = self._destinos[o]
+        return self._pagina(ordem, pagina, por_pagina, {
+            "População total": self.valores["populacao"],
+            f"Nascidos em {origem}": self.matriz[:, o],
+            "Percentual": self.parcela[:, o],
+        })
+
+    def quantidade_destinos(self, origem, relativo=False, populacao_minima=0):
+        o = self.origens.index(origem)
+        if relativo:
+            return len(self._destinos_parcela[self._minima(populacao_minima)][o])
+        return len(self._destinos[o])
+
+    def dominados_por_fora(self, pagina=0, por_pagina=50):
+        """Municípios em que a maior origem é outra UF, pela parcela dessa origem."""
+        return self._pagina(self._dominados, pagina, por_pagina, {
+            "População total": self.valores["populacao"],
+            "Maior origem": np.asarray(self.origens, dtype=object)[self.maior_origem],
+            "Percentual da maior origem": self.parcela_maior,
+        })
+
+    def quantidade_dominados(self):
+        return len(self._dominados)
@@ -0,0 +1,84 @@
+import logging
+import os
+import shutil
+import threading
+import time
+import zipfile
+
+import pytest
+
+import artefatos
+import figuras
+from conftest import RAIZ
+
+FONTES = ("municipios.xlsx", "saldo_migratorio_estados.csv", "imigrantes.xlsx")
+
+
+@pytest.fixture
+def pasta(tmp_path):
+    for nome in FONTES:
+        shutil.copy(os.path.join(RAIZ, nome), tmp_path / nome)
+    return tmp_path
+
+
+def _revisar_planilha(origem, destino):
+    # Mesmas células, outro conteúdo (e outro hash): uma revisão da planilha
+    provisorio = destino.with_suffix(".tmp")
+    with zipfile.ZipFile(origem) as entrada, zipfile.ZipFile(provisorio, "w", zipfile.ZIP_DEFLATED) as saida:
+        for item in entrada.infolist():
+            saida.writestr(item, entrada.read(item.filename))
+        saida.writestr("docProps/revisao.txt", "2")
+    os.replace(provisorio, destino)
+
+
+def test_vigia_sobrevive_a_planilha_truncada(pasta, caplog):
+    grafo = artefatos.grafo_pagina(str(pasta), figuras.CacheFiguras(pasta=str(pasta / "figuras")))
+    indice = grafo.obter("indice")
+    refeitos = []
+    atualizou = threading.Event()
+
+    def ao_atualizar(nomes):
+        refeitos.extend(nomes)
+        atualizou.set()
+
+    caminho = pasta / "municipios.xlsx"
+    shutil.copy(caminho, pasta / "original.xlsx")
+    vigia = artefatos.Vigia(grafo, intervalo=0.05, ao_atualizar=ao_atualizar).iniciar()
+    try:
+        # Upload pela metade: zip truncado
+        with caplog.at_level(logging.WARNING, logger="artefatos"):
+            caminho.write_bytes(caminho.read_bytes()[:500_000])
+            limite = time.monotonic() + 30
+            while not caplog.records and time.monotonic() < limite:
+                time.sleep(0.05)
+        assert caplog.records, "o vigia não tentou refazer a planilha truncada"
+        assert vigia._thread.is_alive()
+        assert grafo.obter("indice") is indice
+        assert grafo.atualizacoes == []
+
+        # Upload terminado
+        _revisar_planilha(pasta / "original.xlsx", caminho)
+        assert atualizou.wait(120)
+        assert "indice" in refeitos
+        assert vigia._thread.is_alive()
+        novo = grafo.obter("indice")
+        assert novo is not indice
+        assert novo.total.sum() == indice.total.sum()
+    finally:
+        vigia.parar()
+
+
+def test_vigiar_de_novo_para_o_vigia_do_grafo_anterior():
+    class GrafoParado:
+        def atualizar(self):
+            return []
+
+    antigo = artefatos.vigiar("teste", GrafoParado(), intervalo=0.01)
+    novo = artefatos.vigiar("teste", GrafoParado(), intervalo=0.01)
+    try:
+        antigo._thread.join(5)
+        assert not antigo._thread.is_alive()
+        assert novo._thread.is_alive()
+    finally:
+        novo.parar()
+        artefatos._vigias.pop("teste", None)
@@ -0,0 +1,32 @@
+import pytest
+
+import busca
+
+
+@pytest.fixture(scope="module")
+def indice():
+    nomes = ["Porto Alegre (RS)", "Londrina (PR)", "Parisi (SP)", "Americano do Brasil (GO)",
+             "Bom Jesus (PI)", "Bom Jesus (RS)", "São Paulo (SP)", "Florianópolis (SC)"]
+    populacoes = [1_332_570, 555_965, 2_000, 6_000, 25_000, 12_000, 11_451_999, 537_211]
+    return busca.IndiceBusca(nomes, populacoes)
+
+
+def test_resolver_aceita_nome_exato_sem_acento_nem_caixa(indice):
+    achados, nao_achados = indice.resolver(["porto alegre", "SAO PAULO", "Bom Jesus (RS)", "Porto Alegre (RS)"])
+    assert achados == ["Porto Alegre (RS)", "São Paulo (SP)", "Bom Jesus (RS)"]
+    assert nao_achados == []
+
+
+@pytest.mark.parametrize("texto", ["Londres", "Paris", "Brasília (GO)", "floripa", "Porto Alegre (SC)"])
+def test_resolver_nao_troca_por_municipio_parecido(indice, texto):
+    assert indice.resolver([texto]) == ([], [texto])
+
+
+def test_homonimo_sem_uf_nao_e_resolvido(indice):
+    assert indice.resolver(["Bom Jesus"]) == ([], ["Bom Jesus"])
+    assert indice.sugerir("Bom Jesus") == ["Bom Jesus (PI)", "Bom Jesus (RS)"]
+
+
+def test_sugerir_aproximacoes(indice):
+    assert indice.sugerir("Paris")[0] == "Parisi (SP)"
+    assert indice.sugerir("floripa")[0] == "Florianópolis (SC)"
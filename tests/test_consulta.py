@@ -0,0 +1,69 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import consulta
+from conftest import RAIZ
+
+
+@pytest.fixture(scope="module")
+def consultas():
+    return consulta.Consultas(RAIZ)
+
+
+@pytest.fixture(scope="module")
+def servidor(consultas):
+    servidor = consulta.criar_servidor(consultas, porta=0)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield "http://%s:%d" % servidor.server_address[:2]
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _get(base, caminho):
+    try:
+        with urllib.request.urlopen(base + caminho) as resposta:
+            return resposta.status, json.loads(resposta.read())
+    except urllib.error.HTTPError as erro:
+        return erro.code, json.loads(erro.read())
+
+
+def test_municipio_pelo_nome_exato(servidor):
+    status, corpo = _get(servidor, "/municipio?nome=Porto%20Alegre%20(RS)")
+    assert status == 200 and corpo["municipio"] == "Porto Alegre (RS)"
+    status, corpo = _get(servidor, "/municipio?nome=porto%20alegre")
+    assert status == 200 and corpo["municipio"] == "Porto Alegre (RS)"
+
+
+@pytest.mark.parametrize("nome", ["Paris", "Londres", "Bras%C3%ADlia%20(GO)"])
+def test_municipio_desconhecido_da_404_com_sugestoes(servidor, nome):
+    status, corpo = _get(servidor, "/municipio?nome=" + nome)
+    assert status == 404
+    assert "municipio" not in corpo and isinstance(corpo["sugestoes"], list)
+
+
+def test_lote_nao_substitui_nomes(servidor):
+    status, corpo = _get(servidor, "/lote?nome=Paris&nome=Caxias%20do%20Sul%20(RS)")
+    assert status == 200
+    assert [m["Município"] for m in corpo["municipios"]] == ["Caxias do Sul (RS)"]
+    assert corpo["nao_encontrados"] == ["Paris"]
+    assert corpo["sugestoes"]["Paris"][0] == "Parisi (SP)"
+
+
+def test_sugestoes_marcadas_como_aproximadas(servidor):
+    status, corpo = _get(servidor, "/sugestoes?nome=floripa&k=2")
+    assert status == 200 and corpo["aproximado"] is True
+    assert corpo["sugestoes"][0] == "Florianópolis (SC)" and len(corpo["sugestoes"]) == 2
+
+
+def test_erro_inesperado_da_500_em_json(servidor, consultas, monkeypatch, caplog):
+    # Planilha de saldo sumiu entre uma consulta e outra
+    monkeypatch.setattr(consultas, "caminho_saldo", "/nao/existe.csv")
+    status, corpo = _get(servidor, "/saldo")
+    assert status == 500 and corpo["erro"].startswith("erro interno")
+    assert any(r.name == "consulta" and r.levelname == "ERROR" for r in caplog.records)
+    # O servidor continua respondendo
+    assert _get(servidor, "/municipio?nome=Porto%20Alegre%20(RS)")[0] == 200
@@ -0,0 +1,42 @@
+import os
+import shutil
+
+import numpy as np
+
+import dados
+from conftest import RAIZ
+
+
+def test_npy_truncado_no_cache_refaz_a_partir_da_planilha(tmp_path):
+    caminho = tmp_path / "municipios.xlsx"
+    shutil.copy(os.path.join(RAIZ, "municipios.xlsx"), caminho)
+    original = dados.carregar_colunas_municipios(str(caminho))
+
+    meta = dados._ler_meta(str(caminho))
+    pasta = os.path.join(dados._pasta_cache(str(caminho)), meta["pasta"])
+    assert not [nome for nome in os.listdir(pasta) if nome.endswith(".tmp")]
+    npy = os.path.join(pasta, "populacao.npy")
+    with open(npy, "r+b") as f:
+        f.truncate(os.path.getsize(npy) // 2)
+
+    refeita = dados.carregar_colunas_municipios(str(caminho))
+    np.testing.assert_array_equal(refeita["populacao"], original["populacao"])
+    # O cache foi regravado inteiro
+    np.testing.assert_array_equal(dados._ler_cache(str(caminho), meta)["populacao"], original["populacao"])
+
+
+def test_touch_com_cache_somente_leitura_segue_no_cache(tmp_path, monkeypatch):
+    caminho = tmp_path / "municipios.xlsx"
+    shutil.copy(os.path.join(RAIZ, "municipios.xlsx"), caminho)
+    original = dados.carregar_colunas_municipios(str(caminho))
+
+    def sem_permissao(*args):
+        raise PermissionError("cache somente leitura")
+
+    # Mesmo conteúdo, outro mtime; a planilha não pode ser relida
+    os.utime(caminho, ns=(0, 0))
+    monkeypatch.setattr(dados, "_gravar_meta", sem_permissao)
+    monkeypatch.setattr(dados, "ler_municipios_xlsx", sem_permissao)
+    do_cache = dados.carregar_colunas_municipios(str(caminho))
+    assert isinstance(do_cache["populacao"], np.memmap)
+    np.testing.assert_array_equal(do_cache["populacao"], original["populacao"])
@@ -0,0 +1,28 @@
+import os
+
+import exportar
+from conftest import RAIZ
+
+
+def test_fotos_vem_do_arquivo_de_cada_legenda():
+    elementos, fotos = exportar.elementos_pagina(RAIZ)
+    legendas = [legenda for e in elementos if e.type == "image" for legenda in e.captions]
+    assert sorted(legendas) == sorted(fotos)
+    arquivos = {legenda.split(" ")[0]: os.path.basename(caminho) for legenda, caminho in fotos.items()}
+    assert arquivos["Wisnel"] == "wisnel.png"
+    assert arquivos["Florianópolis"] == "florianopolis.jpg"
+    assert arquivos["Imigrantes"] == "agenciasenado.jpg"
+
+
+def test_foto_sem_variantes_vai_como_o_original(tmp_path, monkeypatch):
+    # Cache de imagens sem escrita: imagens.variante devolve o próprio original
+    def sem_permissao(caminho):
+        raise PermissionError("cache somente leitura")
+
+    monkeypatch.setattr(exportar.imagens, "preparar", sem_permissao)
+    saida = exportar.Saida(str(tmp_path))
+    trecho = exportar._foto(saida, os.path.join(RAIZ, "wisnel.png"), "Wisnel", primeira=True)
+    [copiada] = saida.tamanhos
+    assert copiada.startswith("imagens/wisnel-") and copiada.endswith(".png")
+    assert f'src="{copiada}"' in trecho
+    assert "srcset" not in trecho
@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+import pytest
+
+import formatacao
+
+
+def _esperado_percentual(valor, casas):
+    valor = 0.0 if math.isnan(valor) else valor
+    return f"{valor:.{casas}f}%".replace(".", ",")
+
+
+def _esperado_inteiro(valor):
+    return f"{valor:,}".replace(",", ".")
+
+
+def test_inteiros_com_negativos_e_separador():
+    valores = [0, 7, -7, 999, -1_000, 123_456, -1_234_567, 9_223_372_036_854_775_807]
+    assert formatacao.formatar_inteiros(valores).tolist() == [_esperado_inteiro(v) for v in valores]
+
+
+def test_inteiros_aleatorios_batem_com_format():
+    valores = np.random.default_rng(0).integers(-10**12, 10**12, size=2_000)
+    assert formatacao.formatar_inteiros(valores).tolist() == [_esperado_inteiro(int(v)) for v in valores]
+
+
+@pytest.mark.parametrize("casas", [0, 1, 2, 3])
+def test_percentuais_com_negativos_nan_e_empates(casas):
+    valores = [0.0, -0.0, 12.5, -12.5, 0.25, 0.125, 2.675, 1.005, -2.675, 0.5, 1.5, 2.5,
+               -0.004, 99.95, 100.0, 1234.5678, float("nan"), -float("nan")]
+    assert formatacao.formatar_percentuais(valores, casas).tolist() == [
+        _esperado_percentual(v, casas) for v in valores
+    ]
+
+
+def test_percentuais_aleatorios_batem_com_format():
+    # Múltiplos de 0,005 caem em empates na segunda casa
+    gerador = np.random.default_rng(1)
+    valores = np.concatenate([gerador.normal(0, 50, 2_000), np.arange(-2_000, 2_000) * 0.005])
+    assert formatacao.formatar_percentuais(valores).tolist() == [_esperado_percentual(v, 2) for v in valores]
+
+
+def test_entrada_vazia_preserva_o_formato():
+    assert formatacao.formatar_inteiros([]).shape == (0,)
+    assert formatacao.formatar_percentuais(np.empty((0, 3))).shape == (0, 3)
+    assert formatacao.rotulos_celulas(np.empty((0, 27)), np.empty((0, 27))).shape == (0, 27)
+    # Só células sem população: nada a formatar
+    assert formatacao.rotulos_celulas(np.ones((2, 2)), np.zeros((2, 2))).tolist() == [["—", "—"], ["—", "—"]]
+
+
+def test_rotulos_celulas():
+    percentuais = np.array([[12.25, float("nan"), 0.05], [-3.35, 100.0, 7.0]])
+    populacoes = np.array([[1_234, 5, 0], [float("nan"), 2_000_000, 1]])
+    assert formatacao.rotulos_celulas(percentuais, populacoes).tolist() == [
+        ["12,2%<br>1.234", "0,0%<br>5", "—"],
+        ["—", "100,0%<br>2.000.000", "7,0%<br>1"],
+    ]
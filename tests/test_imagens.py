@@ -0,0 +1,37 @@
+import os
+
+from PIL import Image
+
+import imagens
+
+
+def _salvar(caminho, cor):
+    Image.new("RGB", (800, 600), cor).save(caminho)
+
+
+def _arquivos(pasta):
+    return sorted(a for a in os.listdir(pasta) if a.endswith(imagens.EXTENSAO))
+
+
+def test_foto_alterada_apaga_as_variantes_antigas(tmp_path):
+    foto = tmp_path / "foto.png"
+    _salvar(foto, "red")
+    antigas = imagens.preparar(str(foto))
+    pasta = os.path.dirname(antigas[800])
+
+    _salvar(foto, "blue")
+    novas = imagens.preparar(str(foto))
+    assert set(novas.values()).isdisjoint(antigas.values())
+    assert _arquivos(pasta) == sorted(os.path.basename(v) for v in novas.values())
+
+
+def test_variantes_compartilhadas_por_outra_foto_ficam(tmp_path):
+    foto, copia = tmp_path / "foto.png", tmp_path / "copia.png"
+    _salvar(foto, "red")
+    _salvar(copia, "red")
+    da_copia = imagens.preparar(str(copia))
+    imagens.preparar(str(foto))
+
+    _salvar(foto, "blue")
+    imagens.preparar(str(foto))
+    assert all(os.path.exists(v) for v in da_copia.values())
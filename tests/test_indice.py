@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dados
+from conftest import RAIZ
+
+AMOSTRA = ["Porto Alegre (RS)", "São Paulo (SP)", "Brasília (DF)", "Alta Floresta D'Oeste (RO)", "Serra da Saudade (MG)"]
+
+
+@pytest.fixture(scope="module")
+def planilha():
+    # A tabela da planilha como o script a usava, uma linha por município e origem
+    tabela = dados.carregar_colunas_municipios(os.path.join(RAIZ, "municipios.xlsx"))
+    validas = np.asarray(tabela["origem"]) >= 0
+    return pd.DataFrame({
+        "Município": np.asarray(tabela["municipios"], dtype=object)[tabela["municipio"][validas]],
+        "Origem": np.asarray(tabela["origens"], dtype=object)[tabela["origem"][validas]],
+        "População": np.asarray(tabela["populacao"])[validas],
+    })
+
+
+@pytest.fixture(scope="module")
+def indice():
+    return dados.IndiceMunicipios(dados.base_municipios(os.path.join(RAIZ, "municipios.xlsx")))
+
+
+def test_totais_e_maiores_batem_com_groupby(planilha, indice):
+    grupos = planilha.groupby("Município")["População"]
+    nomes = list(indice.base.municipios)
+    assert sorted(nomes) == sorted(grupos.groups)
+    np.testing.assert_array_equal(indice.total, grupos.sum()[nomes].to_numpy())
+    np.testing.assert_array_equal(indice.maior, grupos.max()[nomes].to_numpy())
+    np.testing.assert_array_equal(indice.fim - indice.inicio, grupos.size()[nomes].to_numpy())
+
+
+@pytest.mark.parametrize("municipio", AMOSTRA)
+def test_consultar_bate_com_o_filtro_do_script(planilha, indice, municipio):
+    resultado = planilha[planilha["Município"] == municipio]
+    total = resultado["População"].sum()
+    resultado = resultado.sort_values(by="População", ascending=False)
+
+    consulta = indice.consultar(municipio)
+    assert consulta["total"] == total
+    assert consulta["maior"] == resultado["População"].max()
+    assert consulta["migrantes"] == total - resultado["População"].max()
+    # Mesma ordem decrescente; empates podem trocar de lugar entre si
+    np.testing.assert_array_equal(consulta["População"], resultado["População"].to_numpy())
+    assert sorted(zip(consulta["Origem"], consulta["População"].tolist())) == \
+        sorted(zip(resultado["Origem"], resultado["População"]))
+    np.testing.assert_allclose(consulta["Percentual"], resultado["População"].to_numpy() / total * 100)
+    assert consulta["Origem"][0] in set(resultado["Origem"][resultado["População"] == consulta["maior"]])
+
+
+def test_comparar_bate_com_pivot(planilha, indice):
+    comparacao = indice.comparar(AMOSTRA)
+    pivot = (planilha[planilha["Município"].isin(AMOSTRA)]
+             .pivot_table(index="Município", columns="Origem", values="População", aggfunc="sum", fill_value=0)
+             .reindex(index=AMOSTRA, columns=list(indice.base.origens), fill_value=0))
+    np.testing.assert_array_equal(comparacao["populacao"].to_numpy(), pivot.to_numpy())
+
+    resumo = comparacao["resumo"]
+    total = pivot.sum(axis=1).to_numpy()
+    np.testing.assert_array_equal(resumo["População total"].to_numpy(), total)
+    np.testing.assert_array_equal(resumo["Migrantes"].to_numpy(), total - pivot.max(axis=1).to_numpy())
+    np.testing.assert_allclose(comparacao["percentual"].to_numpy(), pivot.to_numpy() / total[:, None] * 100)
+    assert len(comparacao["origens"]) == len(AMOSTRA) * len(indice.base.origens)
+
+
+def test_municipio_desconhecido(indice):
+    with pytest.raises(KeyError):
+        indice.consultar("Londres")
+    with pytest.raises(KeyError, match="Londres"):
+        indice.comparar(["Porto Alegre (RS)", "Londres"])
@@ -0,0 +1,80 @@
+import threading
+import tracemalloc
+
+import pytest
+
+import instrumentacao
+
+
+@pytest.fixture
+def ativa(monkeypatch, tmp_path):
+    monkeypatch.setattr(instrumentacao, "ATIVA", True)
+    monkeypatch.setattr(instrumentacao, "PASTA", str(tmp_path))
+    # Toda execução é amostrada
+    monkeypatch.setattr(instrumentacao, "AMOSTRAGEM_MEMORIA", 1)
+    yield
+    instrumentacao._local.execucao = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def test_rerun_interrompido_na_mesma_thread_nao_prende_tracemalloc(ativa):
+    instrumentacao.iniciar_execucao()
+    instrumentacao.secao("cabecalho")
+    # RerunException: o script recomeça sem passar pelo finalizar_execucao()
+    instrumentacao.iniciar_execucao()
+    instrumentacao.finalizar_execucao()
+    assert not tracemalloc.is_tracing()
+    assert instrumentacao._execucao() is None
+    assert instrumentacao.execucoes_recentes()[-1]["pico_memoria_bytes"] > 0
+
+
+def test_rerun_interrompido_em_thread_encerrada_nao_prende_tracemalloc(ativa):
+    # Erro no script: a thread do rerun termina com a execução aberta
+    thread = threading.Thread(target=instrumentacao.iniciar_execucao)
+    thread.start()
+    thread.join()
+    assert tracemalloc.is_tracing()
+
+    instrumentacao.iniciar_execucao()
+    instrumentacao.finalizar_execucao()
+    assert not tracemalloc.is_tracing()
+
+
+def test_execucao_aberta_em_outra_thread_continua_amostrada(ativa):
+    comecou, terminar = threading.Event(), threading.Event()
+
+    def outra_sessao():
+        instrumentacao.iniciar_execucao()
+        comecou.set()
+        terminar.wait()
+        instrumentacao.finalizar_execucao()
+
+    thread = threading.Thread(target=outra_sessao)
+    thread.start()
+    comecou.wait()
+    instrumentacao.iniciar_execucao()
+    instrumentacao.finalizar_execucao()
+    assert tracemalloc.is_tracing()
+    terminar.set()
+    thread.join()
+    assert not tracemalloc.is_tracing()
+
+
+def test_cargas_do_grafo_viram_trechos(ativa, tmp_path):
+    import artefatos
+
+    caminho = tmp_path / "fonte.txt"
+    caminho.write_text("1")
+    grafo = artefatos.Grafo()
+    grafo.fonte("fonte", str(caminho))
+    grafo.no("numero", lambda c: int(open(c).read()), ["fonte"])
+    grafo.no("dobro", lambda n: 2 * n, ["numero"])
+
+    instrumentacao.iniciar_execucao()
+    assert grafo.obter("dobro") == 2
+    grafo.obter("dobro")
+    instrumentacao.finalizar_execucao()
+    nomes = [t["nome"] for t in instrumentacao.execucoes_recentes()[-1]["trechos"]]
+    # Só as construções contam; o acerto da segunda chamada não
+    assert nomes == ["artefato:numero", "artefato:dobro"]
@@ -0,0 +1,97 @@
+import os
+import zipfile
+from xml.sax.saxutils import escape
+
+import pandas as pd
+import pytest
+
+from conftest import RAIZ
+from leitor_xlsx import ler_municipios_xlsx
+
+NS = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+
+
+def _com_read_excel(caminho):
+    # Como o script fazia antes do leitor incremental
+    df = pd.read_excel(caminho)
+    df.columns = [col.strip() for col in df.columns]
+    df["População"] = df["População"].replace("-", 0).astype(int)
+    return (
+        df["Município"].tolist(),
+        [None if pd.isna(origem) else origem for origem in df["Origem"]],
+        df["População"].tolist(),
+    )
+
+
+def _com_leitor(caminho):
+    tabela = ler_municipios_xlsx(caminho)
+    return (
+        [tabela["municipios"][c] for c in tabela["municipio"]],
+        [None if c < 0 else tabela["origens"][c] for c in tabela["origem"]],
+        tabela["populacao"].tolist(),
+    )
+
+
+def _celula(ref, valor):
+    # Número, índice nas strings compartilhadas (str) ou ("inline", texto)
+    if isinstance(valor, int):
+        return f'<c r="{ref}"><v>{valor}</v></c>'
+    if isinstance(valor, tuple):
+        return f'<c r="{ref}" t="inlineStr"><is><t>{escape(valor[1])}</t></is></c>'
+    return f'<c r="{ref}" t="s"><v>{valor}</v></c>'
+
+
+@pytest.fixture
+def planilha_pequena(tmp_path):
+    # Strings compartilhadas com espaços no cabeçalho, texto em vários <r> e
+    # leitura fonética (<rPh>), que não faz parte do valor
+    strings = [
+        "<t>Município </t>", "<t xml:space=\"preserve\"> Origem</t>", "<t>População </t>",
+        "<r><t xml:space=\"preserve\">São </t></r><r><rPr><b/></rPr><t>Paulo (SP)</t></r>"
+        "<rPh sb=\"0\" eb=\"3\"><t>サンパウロ</t></rPh>",
+        "<t>São Paulo</t><rPh sb=\"0\" eb=\"3\"><t>サン</t></rPh>",
+        "<t>Bahia</t>", "<t>-</t>", "<t>Mãe d'Água (PB)</t>", "<t>Fonte: IBGE - Censo Demográfico</t>",
+    ]
+    linhas = [
+        ["0", "1", "2"],
+        ["3", "4", 1_234_567],
+        ["3", "5", "6"],
+        ["7", "4", ("inline", "12")],
+        ["7", "5", 0],
+        ["8", None, 0],
+    ]
+    xml_strings = f'<?xml version="1.0" encoding="UTF-8"?><sst {NS} count="{len(strings)}" uniqueCount="{len(strings)}">' + \
+        "".join(f"<si>{s}</si>" for s in strings) + "</sst>"
+    xml_linhas = "".join(
+        f'<row r="{i}">' + "".join(_celula(f"{col}{i}", v) for col, v in zip("ABC", linha) if v is not None) + "</row>"
+        for i, linha in enumerate(linhas, 1)
+    )
+    xml_planilha = f'<?xml version="1.0" encoding="UTF-8"?><worksheet {NS}><sheetData>{xml_linhas}</sheetData></worksheet>'
+
+    # As demais partes do pacote vêm da planilha de verdade
+    destino = tmp_path / "pequena.xlsx"
+    with zipfile.ZipFile(os.path.join(RAIZ, "municipios.xlsx")) as original, \
+            zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as saida:
+        for item in original.infolist():
+            if item.filename == "xl/worksheets/sheet1.xml":
+                saida.writestr(item, xml_planilha)
+            elif item.filename == "xl/sharedStrings.xml":
+                saida.writestr(item, xml_strings)
+            else:
+                saida.writestr(item, original.read(item.filename))
+    return str(destino)
+
+
+def test_planilha_pequena_igual_ao_read_excel(planilha_pequena):
+    esperado = _com_read_excel(planilha_pequena)
+    assert _com_leitor(planilha_pequena) == esperado
+    assert esperado == (
+        ["São Paulo (SP)", "São Paulo (SP)", "Mãe d'Água (PB)", "Mãe d'Água (PB)", "Fonte: IBGE - Censo Demográfico"],
+        ["São Paulo", "Bahia", "São Paulo", "Bahia", None],
+        [1_234_567, 0, 12, 0, 0],
+    )
+
+
+def test_municipios_xlsx_igual_ao_read_excel():
+    caminho = os.path.join(RAIZ, "municipios.xlsx")
+    assert _com_leitor(caminho) == _com_read_excel(caminho)
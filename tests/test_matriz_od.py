@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pytest
+
+import dados
+import formatacao
+import matriz_od
+from conftest import RAIZ
+
+# Os cartões de regiões como estavam escritos à mão na página
+CARTOES = {
+    "Norte": {"Norte": "87%", "Nordeste": "6,8%", "Sudeste": "2,1%", "Sul": "1,3%", "Centro-Oeste": "1,7%"},
+    "Nordeste": {"Nordeste": "96,6%", "Norte": "0,4%", "Sudeste": "2,2%", "Sul": "0,2%", "Centro-Oeste": "0,4%"},
+    "Sudeste": {"Sudeste": "88,7%", "Norte": "0,4%", "Nordeste": "8%", "Sul": "1,6%", "Centro-Oeste": "0,6%"},
+    "Sul": {"Sul": "91,9%", "Norte": "0,8%", "Nordeste": "1,7%", "Sudeste": "4%", "Centro-Oeste": "0,6%"},
+    "Centro-Oeste": {"Centro-Oeste": "73,4%", "Norte": "3,1%", "Nordeste": "11,5%", "Sudeste": "7,7%", "Sul": "3,7%"},
+}
+
+
+@pytest.fixture(scope="module")
+def base():
+    return dados.base_municipios(os.path.join(RAIZ, "municipios.xlsx"))
+
+
+def test_matriz_de_regioes_reproduz_os_cartoes(base):
+    pct = matriz_od.calcular_matriz_od(base, diagonal=True)["pct_residentes"]
+    obtido = {
+        destino: {origem: formatacao.formatar_percentual_curto(pct.loc[destino, origem]) for origem in origens}
+        for destino, origens in CARTOES.items()
+    }
+    assert obtido == CARTOES
+
+
+@pytest.mark.parametrize("residencia,origem", [("regiao", "regiao"), ("uf", "uf"), ("uf", "regiao"), ("municipio", "uf"), ("municipio", "regiao")])
+def test_sem_diagonal_zera_so_quem_nasceu_no_lugar(base, residencia, origem):
+    com = matriz_od.calcular_matriz_od(base, residencia, origem, diagonal=True)["populacao"]
+    sem = matriz_od.calcular_matriz_od(base, residencia, origem, diagonal=False)["populacao"]
+
+    # Nível (região ou UF) de origem de cada linha, no mesmo formato das colunas
+    if residencia == "municipio":
+        uf = [matriz_od.uf_do_municipio(nome) for nome in com.index]
+    elif residencia == "uf":
+        uf = list(com.index)
+    else:
+        uf = None
+    if uf is None:
+        local = list(com.index)
+    elif origem == "uf":
+        local = uf
+    else:
+        local = [matriz_od.UFS[sigla][1] if sigla in matriz_od.UFS else None for sigla in uf]
+
+    mesma = np.array([[lugar == coluna for coluna in com.columns] for lugar in local])
+    assert mesma.any(axis=1).sum() > 0
+    assert (sem.to_numpy()[mesma] == 0).all()
+    assert (com.to_numpy()[mesma] > 0).any()
+    np.testing.assert_array_equal(sem.to_numpy()[~mesma], com.to_numpy()[~mesma])
@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dados
+import matriz_od
+import rankings
+from conftest import RAIZ
+
+
+@pytest.fixture(scope="module")
+def indice():
+    return dados.IndiceMunicipios(dados.base_municipios(os.path.join(RAIZ, "municipios.xlsx")))
+
+
+@pytest.fixture(scope="module")
+def ranks(indice):
+    return rankings.Rankings(indice)
+
+
+@pytest.fixture(scope="module")
+def metricas(indice):
+    # As mesmas métricas, município a município, a partir das consultas
+    nomes = indice.base.municipios
+    total = np.array([indice.consultar(m)["total"] for m in nomes])
+    migrantes = np.array([indice.consultar(m)["migrantes"] for m in nomes])
+    nascidos_local = []
+    for nome in nomes:
+        uf = matriz_od.uf_do_municipio(nome)
+        consulta = indice.consultar(nome)
+        local = matriz_od.normalizar(matriz_od.UFS[uf][0]) if uf in matriz_od.UFS else None
+        nascidos_local.append(sum(int(p) for o, p in zip(consulta["Origem"], consulta["População"])
+                                  if matriz_od.normalizar(o) == local))
+    fora = total - np.array(nascidos_local)
+
+    def pct(valores):
+        return np.divide(valores * 100.0, total, out=np.zeros(len(total)), where=total > 0)
+
+    return total, {
+        "populacao": total,
+        "migrantes": migrantes,
+        "pct_migrantes": pct(migrantes),
+        "nascidos_fora": fora,
+        "pct_nascidos_fora": pct(fora),
+    }
+
+
+def _inteiro(ranks, metrica, minima, por_pagina=700):
+    paginas = []
+    for pagina in range(-(-ranks.quantidade(metrica, minima) // por_pagina)):
+        paginas.append(ranks.ranking(metrica, pagina, por_pagina, populacao_minima=minima))
+    return pd.concat(paginas, ignore_index=True)
+
+
+@pytest.mark.parametrize("minima", rankings.POPULACOES_MINIMAS)
+@pytest.mark.parametrize("metrica", list(rankings.METRICAS))
+def test_ranking_igual_ao_argsort_direto(indice, ranks, metricas, metrica, minima):
+    total, por_metrica = metricas
+    valores = por_metrica[metrica]
+    ordem = np.argsort(-valores, kind="stable")
+    ordem = ordem[total[ordem] >= minima]
+
+    quadro = _inteiro(ranks, metrica, minima)
+    assert quadro["Posição"].tolist() == list(range(1, len(ordem) + 1))
+    assert quadro["Município"].tolist() == [indice.base.municipios[i] for i in ordem]
+    assert (quadro["População total"] >= minima).all()
+    np.testing.assert_allclose(quadro[rankings.METRICAS[metrica]].to_numpy(dtype=float), valores[ordem])
+
+
+def test_faixas_minimas_filtram_a_mesma_ordem(ranks):
+    todos = _inteiro(ranks, "pct_migrantes", 0)
+    for minima in rankings.POPULACOES_MINIMAS[1:]:
+        filtrado = todos[todos["População total"] >= minima]["Município"].tolist()
+        assert _inteiro(ranks, "pct_migrantes", minima)["Município"].tolist() == filtrado
+    with pytest.raises(ValueError):
+        ranks.ranking("pct_migrantes", populacao_minima=5_000)
@@ -0,0 +1,72 @@
+import importlib.util
+import json
+import logging
+import os
+
+import pytest
+
+from conftest import RAIZ
+
+_spec = importlib.util.spec_from_file_location("suite", os.path.join(RAIZ, "benchmarks", "suite.py"))
+suite = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(suite)
+
+
+def _registro(**medianas):
+    # Como uma linha do historico.jsonl / a linha_de_base.json
+    return {
+        "ambiente": {"data": "2026-10-01T12:00:00+00:00", "commit": "abc1234", "python": "3.11.7"},
+        "resultados": {nome: {"mediana_ms": ms, "minimo_ms": ms * 0.9, "repeticoes": 5}
+                       for nome, ms in medianas.items()},
+    }
+
+
+def _comparar(base, atual, tolerancias_caso=None):
+    return suite.comparar(atual["resultados"], base["resultados"], 0.25, tolerancias_caso or {}, 2.0)
+
+
+def test_dentro_da_tolerancia_passa():
+    base = _registro(matriz=100.0, rotulos=50.0)
+    assert _comparar(base, _registro(matriz=124.0, rotulos=40.0)) == []
+
+
+def test_piora_alem_da_tolerancia_falha():
+    base = _registro(matriz=100.0, rotulos=50.0)
+    [(nome, atual, antes, variacao)] = _comparar(base, _registro(matriz=130.0, rotulos=50.0))
+    assert (nome, atual, antes) == ("matriz", 130.0, 100.0)
+    assert variacao == pytest.approx(0.30)
+
+
+def test_abaixo_do_piso_nao_conta():
+    # +100% em proporção, mas só 1,5 ms a mais: ruído
+    base = _registro(consulta_hub=1.5)
+    assert _comparar(base, _registro(consulta_hub=3.0)) == []
+    # Passando do piso, a mesma proporção é regressão
+    assert [r[0] for r in _comparar(base, _registro(consulta_hub=3.6))] == ["consulta_hub"]
+
+
+def test_tolerancia_propria_do_caso_e_casos_novos():
+    base = _registro(partida_fria=1000.0)
+    atual = _registro(partida_fria=1800.0, caso_novo=500.0)
+    assert _comparar(base, atual, {"partida_fria": 1.0}) == []
+    assert [r[0] for r in _comparar(base, atual)] == ["partida_fria"]
+
+
+def test_main_sai_com_1_na_regressao(tmp_path, monkeypatch):
+    # Relógio falso: cada repetição do caso leva 20 ms
+    relogio = iter([0.0, 0.020] * 10)
+    monkeypatch.setitem(suite.CASOS, "falso", (lambda ctx: None, 3, False))
+    monkeypatch.setattr(suite.time, "perf_counter", lambda: next(relogio))
+    monkeypatch.chdir(tmp_path)
+    historico, base = tmp_path / "historico.jsonl", tmp_path / "base.json"
+    argumentos = ["--casos", "falso", "--historico", str(historico), "--base", str(base)]
+    try:
+        base.write_text(json.dumps(_registro(falso=18.0)))
+        assert suite.main(argumentos) == 0
+        base.write_text(json.dumps(_registro(falso=10.0)))
+        assert suite.main(argumentos) == 1
+    finally:
+        # main corta os avisos do AppTest para o processo todo
+        logging.disable(logging.NOTSET)
+    linhas = [json.loads(linha) for linha in historico.read_text().splitlines()]
+    assert [r["resultados"]["falso"]["mediana_ms"] for r in linhas] == pytest.approx([20.0, 20.0])